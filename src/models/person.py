@@ -1,9 +1,12 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 import uuid
 
+import numpy as np
+
 class RiskLevel(Enum):
     # Classificação de risco baseada no protocolo de Manchester
     VERMELHO = "Emergência"      # Atendimento imediato
@@ -16,7 +19,7 @@ class Gender(Enum):
     FEMININO = "F"
     OUTRO = "O"
 
-@dataclass
+@dataclass(slots=True)
 class VitalSigns:
     # Sinais vitais do paciente
     pressao_sistolica: float
@@ -41,40 +44,96 @@ class VitalSigns:
         if self.temperatura < 30 or self.temperatura > 45:
             raise ValueError("Temperatura fora do range válido")
 
-@dataclass
+# Sintomas na ordem dos bits de Symptoms.flags (bit 0 = dor_peito)
+SYMPTOM_NAMES = (
+    'dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura', 'vomito',
+    'dor_abdominal', 'convulsoes', 'sangramento_ativo', 'perda_consciencia',
+    'dor_cabeca_intensa', 'fraqueza_extrema', 'palidez_extrema'
+)
+SYMPTOM_BITS = {name: 1 << bit for bit, name in enumerate(SYMPTOM_NAMES)}
+
+# Sintomas de bandeira vermelha e seus nomes de exibição
+RED_FLAG_LABELS = (
+    ('dor_peito', "Dor no peito"),
+    ('dificuldade_respiratoria', "Dificuldade respiratória"),
+    ('convulsoes', "Convulsões"),
+    ('sangramento_ativo', "Sangramento ativo"),
+    ('perda_consciencia', "Perda de consciência"),
+    ('dor_cabeca_intensa', "Dor de cabeça intensa"),
+)
+RED_MASK = sum(SYMPTOM_BITS[name] for name, _ in RED_FLAG_LABELS)
+
 class Symptoms:
-    # Sintomas do paciente
-    dor_peito: bool = False
-    dificuldade_respiratoria: bool = False
-    febre: bool = False
-    tontura: bool = False
-    vomito: bool = False
-    dor_abdominal: bool = False
-    convulsoes: bool = False
-    sangramento_ativo: bool = False
-    perda_consciencia: bool = False
-    dor_cabeca_intensa: bool = False
-    fraqueza_extrema: bool = False
-    palidez_extrema: bool = False
+    # Sintomas do paciente, empacotados em um inteiro: um bit por sintoma.
+    # Cada sintoma continua acessível como atributo booleano (p.ex.
+    # sintomas.dor_peito = True) e aceito como argumento, posicional (na
+    # ordem de SYMPTOM_NAMES) ou nomeado; flags, a máscara pronta, só nomeado.
+    __slots__ = ('flags',)
+    
+    def __init__(self, *values: bool, flags: int = 0, **symptoms: bool):
+        if len(values) > len(SYMPTOM_NAMES):
+            raise TypeError(f"Symptoms aceita no máximo {len(SYMPTOM_NAMES)} sintomas posicionais")
+        self.flags = flags
+        for name, value in zip(SYMPTOM_NAMES, values):
+            if name in symptoms:
+                raise TypeError(f"Sintoma informado duas vezes: {name}")
+            setattr(self, name, value)
+        for name, value in symptoms.items():
+            if name not in SYMPTOM_BITS:
+                raise TypeError(f"Sintoma desconhecido: {name}")
+            setattr(self, name, value)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Symptoms):
+            return NotImplemented
+        return self.flags == other.flags
+    
+    def __repr__(self) -> str:
+        ativos = ', '.join(f"{name}=True" for name in SYMPTOM_NAMES if self.flags & SYMPTOM_BITS[name])
+        return f"Symptoms({ativos})"
+    
+    def to_dict(self) -> Dict[str, bool]:
+        # Formato de serialização: um booleano por sintoma
+        return {name: bool(self.flags & bit) for name, bit in SYMPTOM_BITS.items()}
+    
+    def red_flag_count(self) -> int:
+        # Número de sintomas de bandeira vermelha (os mesmos de
+        # get_red_flag_symptoms), via popcount da máscara
+        return (self.flags & RED_MASK).bit_count()
     
     def get_red_flag_symptoms(self) -> List[str]:
         # Retorna sintomas de bandeira vermelha
-        red_flags = []
-        if self.dor_peito:
-            red_flags.append("Dor no peito")
-        if self.dificuldade_respiratoria:
-            red_flags.append("Dificuldade respiratória")
-        if self.convulsoes:
-            red_flags.append("Convulsões")
-        if self.sangramento_ativo:
-            red_flags.append("Sangramento ativo")
-        if self.perda_consciencia:
-            red_flags.append("Perda de consciência")
-        if self.dor_cabeca_intensa:
-            red_flags.append("Dor de cabeça intensa")
-        return red_flags
+        return [label for name, label in RED_FLAG_LABELS if self.flags & SYMPTOM_BITS[name]]
+
+def _symptom_property(bit: int) -> property:
+    def getter(self) -> bool:
+        return bool(self.flags & bit)
+    
+    def setter(self, value: bool) -> None:
+        self.flags = self.flags | bit if value else self.flags & ~bit
+    
+    return property(getter, setter)
+
+for _name, _bit in SYMPTOM_BITS.items():
+    setattr(Symptoms, _name, _symptom_property(_bit))
+
+# Condições crônicas (em minúsculas) que caracterizam cada tipo de histórico
+CARDIAC_SET = frozenset((
+    "hipertensão", "infarto", "arritmia", "angina",
+    "insuficiência cardíaca", "valvopatia"
+))
+RESPIRATORY_SET = frozenset((
+    "asma", "dpoc", "pneumonia", "bronquite",
+    "enfisema", "fibrose pulmonar"
+))
 
-@dataclass
+@lru_cache(maxsize=1024)
+def _lowercase_set(conditions: tuple) -> frozenset:
+    # Conjunto em minúsculas de uma lista de doenças; listas iguais
+    # reaproveitam o mesmo resultado
+    return frozenset(condition.lower() for condition in conditions)
+
+@dataclass(slots=True)
 class MedicalHistory:
     # Histórico médico do paciente
     doencas_cronicas: List[str] = field(default_factory=list)
@@ -85,23 +144,13 @@ class MedicalHistory:
     
     def has_cardiac_history(self) -> bool:
         """Verifica se tem histórico cardíaco"""
-        cardiac_conditions = [
-            "hipertensão", "infarto", "arritmia", "angina", 
-            "insuficiência cardíaca", "valvopatia"
-        ]
-        return any(condition.lower() in [d.lower() for d in self.doencas_cronicas] 
-                  for condition in cardiac_conditions)
+        return not CARDIAC_SET.isdisjoint(_lowercase_set(tuple(self.doencas_cronicas)))
     
     def has_respiratory_history(self) -> bool:
         """Verifica se tem histórico respiratório"""
-        respiratory_conditions = [
-            "asma", "dpoc", "pneumonia", "bronquite", 
-            "enfisema", "fibrose pulmonar"
-        ]
-        return any(condition.lower() in [d.lower() for d in self.doencas_cronicas] 
-                  for condition in respiratory_conditions)
+        return not RESPIRATORY_SET.isdisjoint(_lowercase_set(tuple(self.doencas_cronicas)))
 
-@dataclass
+@dataclass(slots=True)
 class Person:
     # Modelo completo de pessoa para triagem hospitalar
     # Identificação
@@ -133,6 +182,33 @@ class Person:
     observacoes_medicas: str = ""
     observacoes_enfermagem: str = ""
     
+    # Resultados derivados memorizados (score, emergência, recomendações) e os
+    # campos de entrada com que foram calculados; descartados na leitura se um
+    # desses campos foi reatribuído, ou recalculados com recompute()
+    _cached_score: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _is_emergency: Optional[bool] = field(default=None, init=False, repr=False, compare=False)
+    _recommendations: Optional[List[str]] = field(default=None, init=False, repr=False, compare=False)
+    _cache_inputs: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    
+    def _score_inputs(self) -> tuple:
+        return (self.idade, self.sinais_vitais, self.sintomas, self.historico_medico, self.nivel_risco)
+    
+    def _check_cache(self) -> None:
+        # Sem __setattr__ próprio: a verificação só acontece ao ler um resultado
+        # memorizado, e não em cada atribuição (inclusive as do __init__)
+        inputs = self._score_inputs()
+        if inputs != self._cache_inputs:
+            self._cached_score = self._is_emergency = self._recommendations = None
+            self._cache_inputs = inputs
+    
+    def recompute(self) -> None:
+        """Recalcula score, emergência e recomendações após atualizar o paciente"""
+        # Necessário quando sinais_vitais/sintomas são alterados in-place
+        self._cache_inputs = self._score_inputs()
+        self._cached_score = self._compute_risk_score()
+        self._is_emergency = self._compute_is_emergency()
+        self._recommendations = self._compute_recommendations()
+    
     def __post_init__(self):
         """Validações e configurações iniciais"""
         if self.idade < 0 or self.idade > 120:
@@ -152,6 +228,12 @@ class Person:
     
     def is_emergency_case(self) -> bool:
         """Verifica se é caso de emergência (vermelho)"""
+        self._check_cache()
+        if self._is_emergency is None:
+            self._is_emergency = self._compute_is_emergency()
+        return self._is_emergency
+    
+    def _compute_is_emergency(self) -> bool:
         if not self.sinais_vitais:
             return False
         
@@ -166,12 +248,20 @@ class Person:
         )
         
         # Critérios de sintomas para emergência
-        emergency_symptoms = len(self.sintomas.get_red_flag_symptoms()) > 0
+        emergency_symptoms = self.sintomas.red_flag_count() > 0
         
         return emergency_vitals or emergency_symptoms
     
     def calculate_risk_score(self) -> float:
         """Calcula score de risco (0-10)"""
+        # Alterações internas em sinais_vitais/sintomas não são detectadas:
+        # reatribua um objeto novo ou chame recompute()
+        self._check_cache()
+        if self._cached_score is None:
+            self._cached_score = self._compute_risk_score()
+        return self._cached_score
+    
+    def _compute_risk_score(self) -> float:
         score = 0.0
         
         if not self.sinais_vitais:
@@ -194,7 +284,7 @@ class Person:
             score += 1
         
         # Sintomas (0-3 pontos)
-        red_flags = len(self.sintomas.get_red_flag_symptoms())
+        red_flags = self.sintomas.red_flag_count()
         if red_flags >= 3:
             score += 3
         elif red_flags >= 2:
@@ -208,8 +298,45 @@ class Person:
         
         return min(score, 10.0)  # Máximo 10 pontos
     
+    @classmethod
+    def calculate_risk_scores_bulk(cls, persons: List['Person']) -> np.ndarray:
+        """Calcula o score de risco (0-10) de vários pacientes de uma vez"""
+        # Mesmas regras de calculate_risk_score, avaliadas como operações
+        # vetorizadas sobre arrays; pacientes sem sinais vitais ficam com 0
+        n = len(persons)
+        has_vitals = np.fromiter((p.sinais_vitais is not None for p in persons), dtype=bool, count=n)
+        vitals = np.array([
+            (v.pressao_sistolica, v.saturacao_oxigenio, v.frequencia_cardiaca, v.temperatura)
+            if v is not None else (120.0, 98.0, 80.0, 36.5)
+            for v in (p.sinais_vitais for p in persons)
+        ], dtype=np.float64).reshape(n, 4)
+        ps, spo2, hr, temp = vitals.T
+        ages = np.fromiter((p.idade for p in persons), dtype=np.float64, count=n)
+        red_flags = np.fromiter((p.sintomas.red_flag_count() for p in persons), dtype=np.int64, count=n)
+        history = np.fromiter(
+            (p.historico_medico.has_cardiac_history() or p.historico_medico.has_respiratory_history()
+             for p in persons), dtype=bool, count=n
+        )
+        
+        score = (
+            2 * (ages > 65) + ((ages > 50) & (ages <= 65))
+            + 2 * ((ps < 90) | (ps > 180))
+            + 2 * (spo2 < 90)
+            + ((hr < 50) | (hr > 120))
+            + (temp > 39.0)
+            + np.minimum(red_flags, 3)
+            + history
+        )
+        return np.where(has_vitals, np.minimum(score, 10), 0).astype(np.float64)
+    
     def get_recommendations(self) -> List[str]:
         """Retorna recomendações baseadas no estado do paciente"""
+        self._check_cache()
+        if self._recommendations is None:
+            self._recommendations = self._compute_recommendations()
+        return list(self._recommendations)
+    
+    def _compute_recommendations(self) -> List[str]:
         recommendations = []
         
         if self.nivel_risco == RiskLevel.VERMELHO:
@@ -247,8 +374,8 @@ class Person:
             'prioridade': self.prioridade,
             'data_chegada': self.data_chegada.isoformat(),
             'queixa_principal': self.queixa_principal,
-            'sinais_vitais': self.sinais_vitais.__dict__ if self.sinais_vitais else None,
-            'sintomas': self.sintomas.__dict__,
+            'sinais_vitais': asdict(self.sinais_vitais) if self.sinais_vitais else None,
+            'sintomas': self.sintomas.to_dict(),
             'risk_score': self.calculate_risk_score(),
             'is_emergency': self.is_emergency_case(),
             'recommendations': self.get_recommendations()
@@ -1,10 +1,31 @@
 from typing import List, Optional, Dict, Any
+from collections import Counter
+from dataclasses import asdict
 from datetime import datetime, timedelta
+import heapq
 import json
+import logging
 import os
+import sqlite3
+import threading
 from abc import ABC, abstractmethod
 
-from .person import Person, RiskLevel, Gender, VitalSigns, Symptoms, MedicalHistory
+import numpy as np
+
+# Serializador JSON em C opcional; sem orjson, usa o json da biblioteca padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .person import Person, RiskLevel, Gender, VitalSigns, Symptoms, MedicalHistory, SYMPTOM_BITS
+
+logger = logging.getLogger(__name__)
+
+# Erros de registros malformados ao reconstruir um Person a partir do dicionário
+RECORD_ERRORS = (KeyError, TypeError, ValueError)
+# Erros do banco SQLite e de payloads inválidos
+SQLITE_ERRORS = (sqlite3.Error,) + RECORD_ERRORS
 
 class PersonDAO(ABC):
     
@@ -38,12 +59,8 @@ class InMemoryPersonDAO(PersonDAO):
         self._data: Dict[str, Person] = {}
     
     def save(self, person: Person) -> bool:
-        try:
-            self._data[person.id] = person
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar pessoa: {e}")
-            return False
+        self._data[person.id] = person
+        return True
     
     def get_by_id(self, person_id: str) -> Optional[Person]:
         return self._data.get(person_id)
@@ -64,7 +81,9 @@ class InMemoryPersonDAO(PersonDAO):
         return False
     
     def get_by_risk_level(self, risk_level: RiskLevel) -> List[Person]:
-        return [person for person in self._data.values() 
+        # Filtra pelo nível atual de cada objeto: os Person armazenados são
+        # os próprios objetos do chamador e podem mudar sem passar por update()
+        return [person for person in self._data.values()
                 if person.nivel_risco == risk_level]
     
     def get_emergency_queue(self) -> List[Person]:
@@ -76,50 +95,25 @@ class InMemoryPersonDAO(PersonDAO):
         if not patients:
             return {}
         
-        now = datetime.now()
-        waiting_times = [(now - p.data_chegada).total_seconds() / 60 
-                        for p in patients]
+        # Chegadas como datetime64 (mesma aritmética de horário local que a
+        # subtração de datetimes) e tempos de espera em minutos, calculados no NumPy
+        arrivals = np.fromiter((p.data_chegada for p in patients), dtype='datetime64[us]', count=len(patients))
+        waiting_times = (np.datetime64(datetime.now(), 'us') - arrivals) / np.timedelta64(1, 'm')
+        # Contagens por nível em uma única passada
+        counts = Counter(p.nivel_risco for p in patients)
         
         return {
             'total_patients': len(patients),
-            'average_waiting_time': sum(waiting_times) / len(waiting_times),
-            'max_waiting_time': max(waiting_times),
-            'min_waiting_time': min(waiting_times),
-            'emergency_count': len(self.get_by_risk_level(RiskLevel.VERMELHO)),
-            'urgent_count': len(self.get_by_risk_level(RiskLevel.AMARELO)),
-            'non_urgent_count': len(self.get_by_risk_level(RiskLevel.VERDE))
+            'average_waiting_time': float(waiting_times.mean()),
+            'max_waiting_time': float(waiting_times.max()),
+            'min_waiting_time': float(waiting_times.min()),
+            'emergency_count': counts[RiskLevel.VERMELHO],
+            'urgent_count': counts[RiskLevel.AMARELO],
+            'non_urgent_count': counts[RiskLevel.VERDE]
         }
 
-class FilePersonDAO(PersonDAO):
-    
-    def __init__(self, file_path: str = "data/persons.json"):
-        self.file_path = file_path
-        self._ensure_directory()
-        self._load_data()
-    
-    def _ensure_directory(self):
-        directory = os.path.dirname(self.file_path)
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
-    
-    def _load_data(self) -> Dict[str, Dict]:
-        try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            print(f"Erro ao carregar dados: {e}")
-            return {}
-    
-    def _save_data(self, data: Dict[str, Dict]) -> bool:
-        try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar dados: {e}")
-            return False
+class PersonDictMixin:
+    # Conversão Person <-> dicionário JSON, compartilhada pelos DAOs persistentes
     
     def _dict_to_person(self, data: Dict) -> Person:
         vital_signs = None
@@ -160,68 +154,255 @@ class FilePersonDAO(PersonDAO):
             'tempo_espera_estimado': person.tempo_espera_estimado,
             'observacoes_medicas': person.observacoes_medicas,
             'observacoes_enfermagem': person.observacoes_enfermagem,
-            'sinais_vitais': person.sinais_vitais.__dict__ if person.sinais_vitais else None,
-            'sintomas': person.sintomas.__dict__,
-            'historico_medico': person.historico_medico.__dict__
+            'sinais_vitais': asdict(person.sinais_vitais) if person.sinais_vitais else None,
+            'sintomas': person.sintomas.to_dict(),
+            'historico_medico': asdict(person.historico_medico)
         }
         return data
+
+class FilePersonDAO(PersonDictMixin, PersonDAO):
     
-    def save(self, person: Person) -> bool:
+    def __init__(self, file_path: str = "data/persons.json", flush_every: int = 1,
+                 fsync: bool = False):
+        # Os registros ficam em memória (lidos do arquivo uma única vez);
+        # o arquivo é regravado a cada flush_every alterações e em flush()/close().
+        # fsync=True força a gravação em disco a cada flush (mais lento, mais durável)
+        self.file_path = file_path
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self._pending_writes = 0
+        self._ensure_directory()
+        self._cache: Dict[str, Dict] = self._read_file()
+    
+    def __del__(self):
         try:
-            data = self._load_data()
-            data[person.id] = self._person_to_dict(person)
-            return self._save_data(data)
-        except Exception as e:
-            print(f"Erro ao salvar pessoa: {e}")
+            self.flush()
+        except Exception:
+            pass
+    
+    def _ensure_directory(self):
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+    
+    def _read_file(self) -> Dict[str, Dict]:
+        try:
+            if os.path.exists(self.file_path):
+                if orjson is not None:
+                    with open(self.file_path, 'rb') as f:
+                        return orjson.loads(f.read())
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            return {}
+        except (OSError, ValueError) as e:
+            # ValueError cobre JSON inválido (json e orjson)
+            logger.exception(f"Erro ao carregar dados: {e}")
+            return {}
+    
+    def _save_data(self, data: Dict[str, Dict]) -> bool:
+        try:
+            # Grava em arquivo temporário e substitui atomicamente: uma falha
+            # no meio da escrita nunca deixa o arquivo principal truncado
+            tmp_path = self.file_path + '.tmp'
+            if orjson is not None:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+            
+            # Conteúdo já serializado: escrito direto no descritor, sem a
+            # camada de buffer/texto do open()
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(payload)
+                while view:
+                    view = view[os.write(fd, view):]
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, self.file_path)
+            return True
+        except (OSError, TypeError) as e:
+            logger.exception(f"Erro ao salvar dados: {e}")
             return False
     
+    def _mark_dirty(self) -> bool:
+        self._pending_writes += 1
+        if self._pending_writes >= self.flush_every:
+            return self.flush()
+        return True
+    
+    def flush(self) -> bool:
+        # Grava as alterações pendentes no arquivo
+        if not self._pending_writes:
+            return True
+        if self._save_data(self._cache):
+            self._pending_writes = 0
+            return True
+        return False
+    
+    def close(self) -> bool:
+        return self.flush()
+    
+    def save(self, person: Person) -> bool:
+        self._cache[person.id] = self._person_to_dict(person)
+        return self._mark_dirty()
+    
     def get_by_id(self, person_id: str) -> Optional[Person]:
-        try:
-            data = self._load_data()
-            if person_id in data:
-                return self._dict_to_person(data[person_id])
+        data = self._cache.get(person_id)
+        if data is None:
             return None
-        except Exception as e:
-            print(f"Erro ao buscar pessoa: {e}")
+        try:
+            return self._dict_to_person(data)
+        except RECORD_ERRORS as e:
+            logger.exception(f"Erro ao buscar pessoa: {e}")
             return None
     
     def get_all(self) -> List[Person]:
         try:
-            data = self._load_data()
-            return [self._dict_to_person(person_data) for person_data in data.values()]
-        except Exception as e:
-            print(f"Erro ao buscar todas as pessoas: {e}")
+            return [self._dict_to_person(person_data) for person_data in self._cache.values()]
+        except RECORD_ERRORS as e:
+            logger.exception(f"Erro ao buscar todas as pessoas: {e}")
             return []
     
     def update(self, person: Person) -> bool:
+        if person.id in self._cache:
+            self._cache[person.id] = self._person_to_dict(person)
+            return self._mark_dirty()
+        return False
+    
+    def delete(self, person_id: str) -> bool:
+        if person_id in self._cache:
+            del self._cache[person_id]
+            return self._mark_dirty()
+        return False
+    
+    def get_by_risk_level(self, risk_level: RiskLevel) -> List[Person]:
+        # Filtra pelo valor bruto do registro e só reconstrói os Person encontrados
+        value = risk_level.value
         try:
-            data = self._load_data()
-            if person.id in data:
-                data[person.id] = self._person_to_dict(person)
-                return self._save_data(data)
+            return [self._dict_to_person(person_data) for person_data in self._cache.values()
+                    if person_data.get('nivel_risco') == value]
+        except RECORD_ERRORS as e:
+            logger.exception(f"Erro ao buscar por nível de risco: {e}")
+            return []
+
+class SQLitePersonDAO(PersonDictMixin, PersonDAO):
+    # Uma linha por pessoa: gravações O(1) em vez de regravar o arquivo inteiro,
+    # e índice em nivel_risco para get_by_risk_level. O registro completo fica
+    # em JSON na coluna payload.
+    
+    def __init__(self, db_path: str = "data/persons.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # Conexões por thread: o sqlite3 não permite usar uma conexão fora da
+        # thread que a criou, e o servidor Flask/Gunicorn atende em várias threads
+        self._local = threading.local()
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS persons ("
+                "id TEXT PRIMARY KEY, nivel_risco TEXT, data_chegada TEXT, payload BLOB)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_risco ON persons(nivel_risco)")
+    
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Conexão da thread atual, aberta no primeiro uso; com WAL, leitores
+        # de outras threads não bloqueiam o escritor
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def close(self):
+        # Fecha a conexão da thread atual (cada thread fecha a sua)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    @staticmethod
+    def _dumps(data: Dict) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+    
+    @staticmethod
+    def _loads(payload: bytes) -> Dict:
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+    
+    def _row_for(self, person: Person) -> tuple:
+        data = self._person_to_dict(person)
+        return data['nivel_risco'], data['data_chegada'], self._dumps(data), person.id
+    
+    def save(self, person: Person) -> bool:
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO persons (nivel_risco, data_chegada, payload, id) "
+                    "VALUES (?, ?, ?, ?)",
+                    self._row_for(person)
+                )
+            return True
+        except SQLITE_ERRORS as e:
+            logger.exception(f"Erro ao salvar pessoa: {e}")
             return False
-        except Exception as e:
-            print(f"Erro ao atualizar pessoa: {e}")
+    
+    def get_by_id(self, person_id: str) -> Optional[Person]:
+        try:
+            row = self._conn.execute(
+                "SELECT payload FROM persons WHERE id = ?", (person_id,)
+            ).fetchone()
+            return self._dict_to_person(self._loads(row[0])) if row else None
+        except SQLITE_ERRORS as e:
+            logger.exception(f"Erro ao buscar pessoa: {e}")
+            return None
+    
+    def get_all(self) -> List[Person]:
+        try:
+            rows = self._conn.execute("SELECT payload FROM persons")
+            return [self._dict_to_person(self._loads(payload)) for (payload,) in rows]
+        except SQLITE_ERRORS as e:
+            logger.exception(f"Erro ao buscar todas as pessoas: {e}")
+            return []
+    
+    def update(self, person: Person) -> bool:
+        try:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "UPDATE persons SET nivel_risco = ?, data_chegada = ?, payload = ? WHERE id = ?",
+                    self._row_for(person)
+                )
+            return cursor.rowcount > 0
+        except SQLITE_ERRORS as e:
+            logger.exception(f"Erro ao atualizar pessoa: {e}")
             return False
     
     def delete(self, person_id: str) -> bool:
         try:
-            data = self._load_data()
-            if person_id in data:
-                del data[person_id]
-                return self._save_data(data)
-            return False
-        except Exception as e:
-            print(f"Erro ao remover pessoa: {e}")
+            with self._conn:
+                cursor = self._conn.execute("DELETE FROM persons WHERE id = ?", (person_id,))
+            return cursor.rowcount > 0
+        except SQLITE_ERRORS as e:
+            logger.exception(f"Erro ao remover pessoa: {e}")
             return False
     
     def get_by_risk_level(self, risk_level: RiskLevel) -> List[Person]:
         try:
-            all_persons = self.get_all()
-            return [person for person in all_persons 
-                    if person.nivel_risco == risk_level]
-        except Exception as e:
-            print(f"Erro ao buscar por nível de risco: {e}")
+            rows = self._conn.execute(
+                "SELECT payload FROM persons WHERE nivel_risco = ? ORDER BY data_chegada",
+                (risk_level.value,)
+            )
+            return [self._dict_to_person(self._loads(payload)) for (payload,) in rows]
+        except SQLITE_ERRORS as e:
+            logger.exception(f"Erro ao buscar por nível de risco: {e}")
             return []
 
 class EmergencyPersonService:
@@ -229,6 +410,14 @@ class EmergencyPersonService:
     def __init__(self, dao: PersonDAO):
         self.dao = dao
     
+    def _queue_entries(self) -> List[tuple]:
+        # Pacientes VERMELHO lidos do DAO a cada consulta (uma única consulta
+        # por nível de risco), para que gravações de outros serviços ou workers
+        # sejam sempre vistas. Chave (-score, chegada, id): a menor entrada é o
+        # paciente mais prioritário; o id único desempata antes do Person.
+        return [(-person.calculate_risk_score(), person.data_chegada, person.id, person)
+                for person in self.dao.get_by_risk_level(RiskLevel.VERMELHO)]
+    
     def create_emergency_patient(self, nome: str, idade: int, cpf: str = "", 
                                 queixa_principal: str = "") -> Person:
         person = Person(
@@ -257,44 +446,55 @@ class EmergencyPersonService:
             if person.is_emergency_case():
                 person.nivel_risco = RiskLevel.VERMELHO
             
+            person.recompute()
             return self.dao.update(person)
         except Exception as e:
-            print(f"Erro ao adicionar sinais vitais: {e}")
+            logger.exception(f"Erro ao adicionar sinais vitais: {e}")
             return False
     
     def add_symptoms(self, person: Person, **symptoms) -> bool:
         try:
+            if not isinstance(person.sintomas, Symptoms):
+                raise TypeError(f"sintomas deve ser Symptoms, não {type(person.sintomas).__name__}")
+            # Só nomes de sintomas: atributos internos como flags não são aceitos
             for symptom, value in symptoms.items():
-                if hasattr(person.sintomas, symptom):
+                if symptom in SYMPTOM_BITS:
                     setattr(person.sintomas, symptom, value)
+            # Sintomas alterados in-place: descartar os resultados memorizados
+            person.recompute()
             
             # Recalcular nível de risco baseado nos sintomas
             if person.is_emergency_case():
                 person.nivel_risco = RiskLevel.VERMELHO
+                person.recompute()
             
             return self.dao.update(person)
         except Exception as e:
-            print(f"Erro ao adicionar sintomas: {e}")
+            logger.exception(f"Erro ao adicionar sintomas: {e}")
             return False
     
-    def get_emergency_queue(self) -> List[Person]:
-        emergency_patients = self.dao.get_by_risk_level(RiskLevel.VERMELHO)
-        return sorted(emergency_patients, key=lambda p: (
-            p.calculate_risk_score(),  # Maior score primeiro
-            p.data_chegada  # Mais antigo primeiro
-        ), reverse=True)
+    def get_emergency_queue(self, limit: Optional[int] = None) -> List[Person]:
+        # Maior score primeiro; no empate, o mais antigo primeiro.
+        # Com limit, devolve apenas os limit pacientes mais prioritários.
+        entries = self._queue_entries()
+        if limit is None:
+            entries.sort()
+        else:
+            entries = heapq.nsmallest(limit, entries)
+        return [entry[-1] for entry in entries]
     
     def get_critical_patients(self) -> List[Person]:
-        emergency_patients = self.get_emergency_queue()
-        return [p for p in emergency_patients if p.calculate_risk_score() > 7]
+        return [entry[-1] for entry in sorted(entry for entry in self._queue_entries() if -entry[0] > 7)]
     
     def save_emergency_patient(self, person: Person) -> bool:
         person.nivel_risco = RiskLevel.VERMELHO
+        person.recompute()
         return self.dao.save(person)
     
     def get_emergency_stats(self) -> Dict[str, Any]:
-        emergency_patients = self.get_emergency_queue()
-        critical_patients = self.get_critical_patients()
+        # A ordem da fila não importa para as estatísticas: uma única passada
+        # acumula scores, tempos de espera e a contagem de críticos
+        emergency_patients = self.dao.get_by_risk_level(RiskLevel.VERMELHO)
         
         if not emergency_patients:
             return {
@@ -304,16 +504,28 @@ class EmergencyPersonService:
                 'oldest_patient_waiting': 0
             }
         
-        risk_scores = [p.calculate_risk_score() for p in emergency_patients]
         now = datetime.now()
-        waiting_times = [(now - p.data_chegada).total_seconds() / 60 
-                        for p in emergency_patients]
+        critical_count = 0
+        sum_score, max_score = 0, float('-inf')
+        sum_wait, max_wait = 0.0, float('-inf')
+        for p in emergency_patients:
+            score = p.calculate_risk_score()
+            wait = (now - p.data_chegada).total_seconds() / 60
+            sum_score += score
+            sum_wait += wait
+            if score > max_score:
+                max_score = score
+            if wait > max_wait:
+                max_wait = wait
+            if score > 7:
+                critical_count += 1
         
+        total = len(emergency_patients)
         return {
-            'total_emergency': len(emergency_patients),
-            'critical_count': len(critical_patients),
-            'average_risk_score': sum(risk_scores) / len(risk_scores),
-            'max_risk_score': max(risk_scores),
-            'oldest_patient_waiting': max(waiting_times),
-            'average_waiting_time': sum(waiting_times) / len(waiting_times)
+            'total_emergency': total,
+            'critical_count': critical_count,
+            'average_risk_score': sum_score / total,
+            'max_risk_score': max_score,
+            'oldest_patient_waiting': max_wait,
+            'average_waiting_time': sum_wait / total
         }
@@ -2,12 +2,84 @@
             
 import pandas as pd
 import numpy as np
+import copy
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Optional
 
+# Escritor CSV em C opcional; sem pyarrow, usa DataFrame.to_csv
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+# Idade por nível de risco: (média, desvio padrão) da distribuição normal
+AGE_PROFILES = {
+    'VERMELHO': (65, 20),
+    'AMARELO': (55, 25),
+    'VERDE': (40, 20)
+}
+
+# Sintomas mais prováveis com a idade: faixas (idade <= 60, 61-70, > 70) e
+# multiplicador da probabilidade de cada sintoma afetado por faixa
+AGE_BUCKET_LIMITS = [60, 70]
+SYMPTOM_AGE_MULTIPLIERS = {
+    'dor_peito': (1.0, 1.5, 1.5),
+    'dificuldade_respiratoria': (1.0, 1.0, 1.3)
+}
+
+# Pressão nos casos críticos: 30% de hipertensão e, dos demais, 20% de
+# hipotensão; limiares acumulados para um único sorteio uniforme
+HIPERTENSAO_LIMIAR = 0.3
+HIPOTENSAO_LIMIAR = HIPERTENSAO_LIMIAR + (1 - HIPERTENSAO_LIMIAR) * 0.2
+
+# Campos do paciente em tempo real, na ordem esperada pelo agente
+REAL_TIME_FIELDS = (
+    'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
+    'saturacao_oxigenio', 'temperatura', 'idade', 'sexo',
+    'dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura',
+    'vomito', 'dor_abdominal'
+)
+
+# Pacientes sorteados por bloco em generate_real_time_patient
+REAL_TIME_BATCH = 64
+
+# Categorias de sexo, na ordem dos códigos (0 = 'F', 1 = 'M')
+SEXO_CATEGORIES = ['F', 'M']
+
+# Sinais vitais gerados: (casas decimais, mínimo, máximo fisiológico, dtype)
+VITAL_LIMITS = {
+    'pressao_sistolica': (0, 60, 250, np.int16),
+    'pressao_diastolica': (0, 30, 150, np.int16),
+    'frequencia_cardiaca': (0, 30, 200, np.int16),
+    'saturacao_oxigenio': (1, 60, 100, np.float32),
+    'temperatura': (1, 34.0, 43.0, np.float32)
+}
+
+# Período coberto pelos timestamps do dataset de exemplo
+SAMPLE_DATASET_SPAN = timedelta(days=30)
+
+@lru_cache(maxsize=8)
+def _timestamp_offsets(n_samples: int) -> np.ndarray:
+    # Deslocamentos (em µs) igualmente espaçados ao longo do período, como
+    # pd.date_range(periods=n); dependem só de n, então são calculados uma vez
+    span_us = SAMPLE_DATASET_SPAN // timedelta(microseconds=1)
+    offsets = np.linspace(0, span_us, n_samples).round().astype('timedelta64[us]')
+    offsets.flags.writeable = False
+    return offsets
+
+def _generate_chunk(generator: 'DataGenerator', n_samples: int) -> pd.DataFrame:
+    # Executado nos processos de generate_synthetic_data(n_workers > 1)
+    return generator.generate_synthetic_data(n_samples)
 
 class DataGenerator:
-    def __init__(self):
+    def __init__(self, rng: Optional[np.random.Generator] = None, seed: Optional[int] = None):
+        # Gerador aleatório da instância (PCG64); pode ser compartilhado (rng)
+        # ou criado a partir de uma semente para resultados reproduzíveis
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+
         # Perfis de risco para geração de dados sintéticos
         self.risk_profiles = {
             'VERMELHO': {
@@ -65,123 +137,138 @@ class DataGenerator:
                 }
             }
         }
+        self._compile_profiles()
 
-    # Gerar dados baseados no perfil de risco
-    def generate_synthetic_data(self, n_samples: int = 1000) -> pd.DataFrame:
-        data = []
-        for _ in range(n_samples):
-            risk_level = np.random.choice(
-                list(self.risk_profiles.keys()),
-                p=[profile['weight'] for profile in self.risk_profiles.values()]
-            )
-            patient_data = self._generate_patient_data(risk_level)
-            patient_data['risk_level'] = risk_level
-            data.append(patient_data)
-        df = pd.DataFrame(data)
-        # Adicionar variações e ruído para tornar mais realista
-        df = self._add_realistic_variations(df)
-        return df
+    def _compile_profiles(self):
+        # Parâmetros dos perfis em arrays indexados pelo código do nível de risco
+        # (ordem de risk_profiles); chamar de novo se risk_profiles for alterado
+        profiles = list(self.risk_profiles.values())
+        self._risk_levels = list(self.risk_profiles.keys())
+        self._risk_weights = np.array([profile['weight'] for profile in profiles])
+        # Pacientes em tempo real já sorteados (ver generate_real_time_patient)
+        self._real_time_rows = []
+        self._critical_code = self._risk_levels.index('VERMELHO')
+        self._age_params = np.array([AGE_PROFILES[level] for level in self._risk_levels], dtype=float)
+        # Limites (mín, máx) dos sinais vitais: shape (3, n_vitais, 2)
+        self._vital_names = list(profiles[0]['vital_signs'])
+        self._vital_bounds = np.array(
+            [[profile['vital_signs'][vital] for vital in self._vital_names] for profile in profiles],
+            dtype=float
+        )
+        # Probabilidades dos sintomas: shape (3, n_sintomas)
+        self._symptom_names = list(profiles[0]['symptoms_prob'])
+        self._symptom_probs = np.array(
+            [[profile['symptoms_prob'][symptom] for symptom in self._symptom_names] for profile in profiles]
+        )
+        # Multiplicadores por faixa etária: shape (n_faixas, n_sintomas)
+        self._age_mult = np.ones((len(AGE_BUCKET_LIMITS) + 1, len(self._symptom_names)))
+        for symptom, multipliers in SYMPTOM_AGE_MULTIPLIERS.items():
+            self._age_mult[:, self._symptom_names.index(symptom)] = multipliers
 
-    def _generate_patient_data(self, risk_level: str) -> Dict:
-        profile = self.risk_profiles[risk_level]
-
-        # Gerar idade (idosos têm mais risco)
-        if risk_level == 'VERMELHO':
-            idade = np.random.normal(65, 20)
-        elif risk_level == 'AMARELO':
-            idade = np.random.normal(55, 25)
-        else:  # VERDE
-            idade = np.random.normal(40, 20)
-
-        idade = max(18, min(95, int(idade)))
-
-        # Gerar sexo
-        sexo = np.random.choice(['M', 'F'])
-
-        # Gerar sinais vitais
-        vital_signs = {}
-        for vital, (min_val, max_val) in profile['vital_signs'].items():
-            if risk_level == 'VERMELHO':
-                # Mais variabilidade para casos críticos
-                if vital in ['pressao_sistolica', 'pressao_diastolica']:
-                    if np.random.random() < 0.3:  # 30% chance de hipertensão
-                        vital_signs[vital] = np.random.normal(max_val, 20)
-                    elif np.random.random() < 0.2:  # 20% chance de hipotensão
-                        vital_signs[vital] = np.random.normal(min_val, 10)
-                    else:
-                        vital_signs[vital] = np.random.uniform(min_val, max_val)
-                else:
-                    vital_signs[vital] = np.random.uniform(min_val, max_val)
-            else:
-                vital_signs[vital] = np.random.uniform(min_val, max_val)
-
-        # Gerar sintomas
-        symptoms = {}
-        for symptom, prob in profile['symptoms_prob'].items():
-            # Ajustar probabilidade baseada na idade
-            if symptom == 'dor_peito' and idade > 60:
-                prob *= 1.5
-            elif symptom == 'dificuldade_respiratoria' and idade > 70:
-                prob *= 1.3
-            
-            symptoms[symptom] = np.random.random() < prob
-
-        # Combinar todos os dados
-        patient_data = {
-            'idade': idade,
-            'sexo': sexo,
-            **vital_signs,
-            **symptoms
-        }
+    # Gerar dados baseados no perfil de risco: cada coluna é sorteada de uma
+    # vez para todas as amostras, indexando os parâmetros pelo nível de risco
+    def generate_synthetic_data(self, n_samples: int = 1000, n_workers: int = 1) -> pd.DataFrame:
+        # n_workers > 1 divide as amostras entre processos (útil para milhões de linhas)
+        if n_workers > 1 and n_samples >= n_workers:
+            return self._generate_parallel(n_samples, n_workers)
+
+        return pd.DataFrame(self._synthetic_columns(n_samples), copy=False)
 
-        return patient_data
+    def _synthetic_columns(self, n_samples: int, sexo_dummy: bool = False) -> Dict[str, np.ndarray]:
+        # Colunas do dataset sintético; com sexo_dummy, o sexo sai direto como
+        # a coluna 0/1 sexo_M (os códigos sorteados), sem a categoria 'F'/'M'
+        risk_idx, idade, sexo_codes, vitals, symptoms = self._sample_raw(n_samples)
 
-    def _add_realistic_variations(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Arredondar valores
-        df['pressao_sistolica'] = df['pressao_sistolica'].round(0)
-        df['pressao_diastolica'] = df['pressao_diastolica'].round(0)
-        df['frequencia_cardiaca'] = df['frequencia_cardiaca'].round(0)
-        df['saturacao_oxigenio'] = df['saturacao_oxigenio'].round(1)
-        df['temperatura'] = df['temperatura'].round(1)
+        if sexo_dummy:
+            data = {'idade': idade, 'sexo_M': sexo_codes.view(np.uint8)}
+        else:
+            # Sexo como categoria: código 1 = 'M', que já é o valor de sexo_M
+            sexo = pd.Categorical.from_codes(sexo_codes, categories=SEXO_CATEGORIES)
+            data = {'idade': idade, 'sexo': sexo}
 
-        # Garantir limites fisiológicos
-        df['pressao_sistolica'] = df['pressao_sistolica'].clip(60, 250)
-        df['pressao_diastolica'] = df['pressao_diastolica'].clip(30, 150)
-        df['frequencia_cardiaca'] = df['frequencia_cardiaca'].clip(30, 200)
-        df['saturacao_oxigenio'] = df['saturacao_oxigenio'].clip(60, 100)
-        df['temperatura'] = df['temperatura'].clip(34.0, 43.0)
+        for vital, values in vitals.items():
+            # Arredondar e garantir limites fisiológicos já no tipo final da coluna
+            decimals, lower, upper, dtype = VITAL_LIMITS[vital]
+            data[vital] = np.clip(np.round(values, decimals), lower, upper).astype(dtype)
 
-        # Adicionar correlações realistas
         # Pressão diastólica não pode ser maior que sistólica
-        df['pressao_diastolica'] = np.minimum(
-            df['pressao_diastolica'], 
-            df['pressao_sistolica'] - 10
-        )
+        data['pressao_diastolica'] = np.minimum(data['pressao_diastolica'], data['pressao_sistolica'] - 10)
 
-        return df
+        # Sintomas como colunas uint8 (0/1), fatias da matriz (N, 6)
+        data.update(zip(self._symptom_names, symptoms.view(np.uint8).T))
+
+        # Nível de risco como categoria, sem uma string Python por amostra
+        data['risk_level'] = pd.Categorical.from_codes(risk_idx, categories=self._risk_levels)
+        return data
+
+    def _sample_raw(self, n_samples: int):
+        # Sorteia n_samples pacientes de uma vez: códigos de risco, idade,
+        # códigos de sexo, sinais vitais crus (sem arredondar) e sintomas (N, 6)
+        rng = self.rng
+        risk_idx = rng.choice(len(self._risk_levels), size=n_samples, p=self._risk_weights)
+        critical = risk_idx == self._critical_code
+
+        # Idade (idosos têm mais risco)
+        age_params = self._age_params[risk_idx]
+        idade = np.clip(rng.normal(age_params[:, 0], age_params[:, 1]).astype(np.int16), 18, 95)
+
+        sexo_codes = rng.integers(2, size=n_samples, dtype=np.int8)
+
+        # Sinais vitais sorteados em blocos por nível de risco, com limites
+        # escalares (mín, máx) do perfil; order leva cada bloco de volta às
+        # posições dos seus pacientes na amostra
+        vitals = {}
+        order = np.argsort(risk_idx, kind='stable')
+        counts = np.bincount(risk_idx, minlength=len(self._risk_levels)).tolist()
+        min_crit, max_crit = self._vital_bounds[self._critical_code].T
+        for j, vital in enumerate(self._vital_names):
+            values = np.empty(n_samples)
+            values[order] = np.concatenate([
+                rng.uniform(low, high, size=count)
+                for (low, high), count in zip(self._vital_bounds[:, j].tolist(), counts)
+            ])
+            if vital in ('pressao_sistolica', 'pressao_diastolica'):
+                # Casos críticos: 30% de hipertensão; dos demais, 20% de hipotensão
+                u = rng.random(n_samples)
+                hipertensao = critical & (u < HIPERTENSAO_LIMIAR)
+                hipotensao = critical & (u >= HIPERTENSAO_LIMIAR) & (u < HIPOTENSAO_LIMIAR)
+                values[hipertensao] = rng.normal(max_crit[j], 20, size=int(hipertensao.sum()))
+                values[hipotensao] = rng.normal(min_crit[j], 10, size=int(hipotensao.sum()))
+            vitals[vital] = values
+
+        # Sintomas: matriz (N, 6) de probabilidades, ajustada pela idade
+        age_bucket = np.digitize(idade, AGE_BUCKET_LIMITS, right=True)
+        probs = self._symptom_probs[risk_idx] * self._age_mult[age_bucket]
+        symptoms = rng.random(probs.shape) < probs
+
+        return risk_idx, idade, sexo_codes, vitals, symptoms
+
+    def _generate_parallel(self, n_samples: int, n_workers: int) -> pd.DataFrame:
+        # Pacientes são independentes: cada processo gera um bloco com um fluxo
+        # aleatório próprio, derivado (SeedSequence.spawn) do gerador da instância
+        seeds = np.random.SeedSequence(int(self.rng.integers(2**63))).spawn(n_workers)
+        sizes = [n_samples // n_workers + (i < n_samples % n_workers) for i in range(n_workers)]
+        workers = []
+        for seed in seeds:
+            worker = copy.copy(self)
+            worker.rng = np.random.default_rng(seed)
+            workers.append(worker)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            parts = list(executor.map(_generate_chunk, workers, sizes))
+        return pd.concat(parts, ignore_index=True)
 
     def generate_sample_dataset(self, filename: str = None) -> pd.DataFrame:
         """
         Gerar dataset de exemplo e salvar
         """
-        # Gerar dados
-        df = self.generate_synthetic_data(n_samples=1000)
-
-        # Adicionar metadados
-        df['timestamp'] = pd.date_range(
-            start=datetime.now() - timedelta(days=30),
-            end=datetime.now(),
-            periods=len(df)
-        )
+        # Gerar dados, já com o sexo como dummy sexo_M
+        n_samples = 1000
+        data = self._synthetic_columns(n_samples, sexo_dummy=True)
 
-        # Converter colunas booleanas para int
-        bool_columns = ['dor_peito', 'dificuldade_respiratoria', 'febre', 'tontura', 'vomito', 'dor_abdominal']
-        for col in bool_columns:
-            df[col] = df[col].astype(int)
-
-        # Converter sexo para dummy
-        df['sexo_M'] = (df['sexo'] == 'M').astype(int)
-        df = df.drop('sexo', axis=1)
+        # Adicionar metadados: últimos 30 dias, a partir dos deslocamentos em cache
+        start = np.datetime64(datetime.now() - SAMPLE_DATASET_SPAN, 'us')
+        data['timestamp'] = start + _timestamp_offsets(n_samples)
+        df = pd.DataFrame(data, copy=False)
 
         # Reorganizar colunas
         feature_columns = [
@@ -195,39 +282,49 @@ class DataGenerator:
 
         # Salvar se especificado
         if filename:
-            df.to_csv(filename, index=False)
+            if pacsv is None or not self._write_csv_arrow(df, filename):
+                df.to_csv(filename, index=False)
             print(f"Dataset salvo como: {filename}")
 
         return df
 
+    @staticmethod
+    def _write_csv_arrow(df: pd.DataFrame, filename: str) -> bool:
+        # Mesmo formato do to_csv: cabeçalho e valores sem aspas. quoting_style
+        # só existe em versões recentes do pyarrow; nas antigas (TypeError) ou
+        # com tipos não suportados, devolve False e o chamador usa to_csv
+        try:
+            write_options = pacsv.WriteOptions(include_header=False, quoting_style='none')
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with open(filename, 'wb') as f:
+                f.write((','.join(df.columns) + '\n').encode('utf-8'))
+                pacsv.write_csv(table, f, write_options=write_options)
+            return True
+        except (TypeError, pa.ArrowInvalid):
+            return False
+
     def generate_real_time_patient(self) -> Dict:
         """
         Gerar dados de um paciente em tempo real
         """
-        # Selecionar nível de risco aleatório
-        risk_level = np.random.choice(
-            list(self.risk_profiles.keys()),
-            p=[profile['weight'] for profile in self.risk_profiles.values()]
-        )
-
-        patient_data = self._generate_patient_data(risk_level)
+        # Pacientes sorteados em blocos pelo caminho vetorizado (sinais vitais
+        # crus, sem arredondar) e entregues um a um
+        if not self._real_time_rows:
+            self._refill_real_time()
+        row = self._real_time_rows.pop()
 
         # Converter para formato compatível com o agente
-        formatted_data = {
-            'pressao_sistolica': patient_data['pressao_sistolica'],
-            'pressao_diastolica': patient_data['pressao_diastolica'],
-            'frequencia_cardiaca': patient_data['frequencia_cardiaca'],
-            'saturacao_oxigenio': patient_data['saturacao_oxigenio'],
-            'temperatura': patient_data['temperatura'],
-            'idade': patient_data['idade'],
-            'sexo': patient_data['sexo'],
-            'dor_peito': patient_data['dor_peito'],
-            'dificuldade_respiratoria': patient_data['dificuldade_respiratoria'],
-            'febre': patient_data['febre'],
-            'tontura': patient_data['tontura'],
-            'vomito': patient_data['vomito'],
-            'dor_abdominal': patient_data['dor_abdominal'],
-            'true_risk': risk_level  # Para validação
-        }
+        formatted_data = dict(zip(REAL_TIME_FIELDS, row))
+        formatted_data['true_risk'] = row[-1]  # Para validação
 
         return formatted_data
+
+    def _refill_real_time(self):
+        risk_idx, idade, sexo_codes, vitals, symptoms = self._sample_raw(REAL_TIME_BATCH)
+        columns = [vitals[field].tolist() for field in REAL_TIME_FIELDS[:5]]
+        columns.append(idade.tolist())
+        columns.append([SEXO_CATEGORIES[code] for code in sexo_codes.tolist()])
+        columns.extend(symptoms[:, self._symptom_names.index(field)].tolist() for field in REAL_TIME_FIELDS[7:])
+        columns.append([self._risk_levels[code] for code in risk_idx.tolist()])
+        # Invertido para que pop() entregue os pacientes na ordem sorteada
+        self._real_time_rows = list(zip(*columns))[::-1]
@@ -1,11 +1,22 @@
 from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.agents.triage_agent import TriageAgent, PatientData
 from src.utils.data_generator import DataGenerator
+from collections.abc import Mapping
+from dataclasses import fields
+from functools import lru_cache
 import logging
+import threading
+
+# Serializador JSON em C opcional; sem orjson, o Flask usa o json da biblioteca padrão
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -14,9 +25,86 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = 'triagem_hospitalar_secret_key'
 
-# Instanciar agente e gerador de dados
-triage_agent = TriageAgent()
-data_generator = DataGenerator()
+class OrjsonProvider(DefaultJSONProvider):
+    # jsonify e request.get_json via orjson; chaves ordenadas como no provedor
+    # padrão, e tipos não nativos (Decimal, dataclasses...) pelo mesmo default
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(
+            obj, default=self.default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+@lru_cache(maxsize=None)
+def get_agent() -> TriageAgent:
+    # Agente criado no primeiro uso, uma vez por processo (cada worker do
+    # Gunicorn carrega o modelo sob demanda, e não na importação do módulo);
+    # compartilhado entre as threads, pois só guarda buffers por thread
+    return TriageAgent()
+
+# Geradores por thread (por greenlet, com workers gevent)
+_local = threading.local()
+
+def get_generator() -> DataGenerator:
+    # O gerador entrega pacientes de um bloco pré-sorteado e não pode ser
+    # usado por várias requisições ao mesmo tempo: cada thread tem o seu,
+    # com estado aleatório próprio (default_rng)
+    generator = getattr(_local, 'generator', None)
+    if generator is None:
+        generator = _local.generator = DataGenerator()
+    return generator
+
+# Valores aceitos para os sintomas em texto (JSON ou checkbox do formulário)
+_TRUE_STRINGS = frozenset(('true', '1', 'on'))
+_FALSE_STRINGS = frozenset(('false', '0'))
+
+def parse_bool(value) -> bool:
+    # Booleanos JSON, 1/0 e as strings true/false, 1/0 e 'on'; qualquer outro
+    # valor é inválido (bool() aceitaria 'false' ou '0' como verdadeiro)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE_STRINGS:
+            return True
+        if text in _FALSE_STRINGS:
+            return False
+    raise ValueError(f'Valor booleano inválido: {value!r}')
+
+# Esquema de entrada do paciente, derivado de PatientData: (campo, conversor,
+# obrigatório). Sinais vitais, idade e sexo são obrigatórios; sintomas
+# ausentes valem False
+PATIENT_SCHEMA = tuple(
+    (f.name, parse_bool if f.type is bool else f.type, f.type is not bool)
+    for f in fields(PatientData)
+)
+
+def parse_patient(data) -> PatientData:
+    # Valida e converte os dados recebidos (JSON ou formulário) em uma única
+    # passada pelo esquema; ValueError descreve o primeiro campo inválido
+    if data is None:
+        raise ValueError('Dados do paciente ausentes')
+    if not isinstance(data, Mapping):
+        raise ValueError('Dados do paciente devem ser um objeto JSON')
+    values = {}
+    for field, convert, required in PATIENT_SCHEMA:
+        value = data.get(field)
+        if value is None:
+            if required:
+                raise ValueError(f'Campo obrigatório: {field}')
+            value = False
+        try:
+            values[field] = convert(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Valor inválido para {field}: {value!r}') from None
+    return PatientData(**values)
 
 @app.route('/')
 def index():
@@ -27,24 +115,10 @@ def triagem():
     if request.method == 'POST':
         try:
             # Obter dados do formulário
-            patient_data = PatientData(
-                pressao_sistolica=float(request.form['pressao_sistolica']),
-                pressao_diastolica=float(request.form['pressao_diastolica']),
-                frequencia_cardiaca=float(request.form['frequencia_cardiaca']),
-                saturacao_oxigenio=float(request.form['saturacao_oxigenio']),
-                temperatura=float(request.form['temperatura']),
-                idade=int(request.form['idade']),
-                sexo=request.form['sexo'],
-                dor_peito=bool(request.form.get('dor_peito')),
-                dificuldade_respiratoria=bool(request.form.get('dificuldade_respiratoria')),
-                febre=bool(request.form.get('febre')),
-                tontura=bool(request.form.get('tontura')),
-                vomito=bool(request.form.get('vomito')),
-                dor_abdominal=bool(request.form.get('dor_abdominal'))
-            )
+            patient_data = parse_patient(request.form)
             
             # Processar triagem
-            result = triage_agent.process_patient(patient_data)
+            result = get_agent().process_patient(patient_data)
             
             return render_template('resultado.html', result=result)
             
@@ -58,37 +132,14 @@ def triagem():
 @app.route('/api/triagem', methods=['POST'])
 def api_triagem():
     try:
-        data = request.get_json()
-        
         # Validar dados recebidos
-        required_fields = [
-            'pressao_sistolica', 'pressao_diastolica', 'frequencia_cardiaca',
-            'saturacao_oxigenio', 'temperatura', 'idade', 'sexo'
-        ]
-        
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Campo obrigatório: {field}'}), 400
-        
-        # Criar objeto PatientData
-        patient_data = PatientData(
-            pressao_sistolica=float(data['pressao_sistolica']),
-            pressao_diastolica=float(data['pressao_diastolica']),
-            frequencia_cardiaca=float(data['frequencia_cardiaca']),
-            saturacao_oxigenio=float(data['saturacao_oxigenio']),
-            temperatura=float(data['temperatura']),
-            idade=int(data['idade']),
-            sexo=data['sexo'],
-            dor_peito=data.get('dor_peito', False),
-            dificuldade_respiratoria=data.get('dificuldade_respiratoria', False),
-            febre=data.get('febre', False),
-            tontura=data.get('tontura', False),
-            vomito=data.get('vomito', False),
-            dor_abdominal=data.get('dor_abdominal', False)
-        )
+        try:
+            patient_data = parse_patient(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Processar triagem
-        result = triage_agent.process_patient(patient_data)
+        result = get_agent().process_patient(patient_data)
         
         return jsonify(result)
         
@@ -99,7 +150,7 @@ def api_triagem():
 @app.route('/paciente-exemplo')
 def paciente_exemplo():
     try:
-        patient_data = data_generator.generate_real_time_patient()
+        patient_data = get_generator().generate_real_time_patient()
         return jsonify(patient_data)
         
     except Exception as e: